@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Corporate-action handling. Prices are stored raw (as traded); splits and
+# dividends live in a separate per-ticker action list whose cumulative factor
+# index is applied on read, so a new split never rewrites stored history.
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+VOLUME_COLUMNS = ("volume",)
+
+# provider column -> action field
+ACTION_COLUMNS = {
+    "Stock Splits": "split",
+    "Dividends": "dividend",
+    "splits": "split",
+    "dividends": "dividend",
+}
+
+ACTION_FIELDS = ["date", "split", "dividend", "factor"]
+
+
+def _days(values) -> np.ndarray:
+    # calendar day of each timestamp, ignoring time of day and timezone
+    dates = pd.to_datetime(pd.Series(values), errors="coerce")
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+def empty_actions() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "split": pd.Series(dtype=float),
+            "dividend": pd.Series(dtype=float),
+            "factor": pd.Series(dtype=float),
+        }
+    )
+
+
+def extract_actions(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split provider split/dividend columns off a fetched price frame.
+
+    Returns `(prices, actions)`: `prices` without the action columns and
+    `actions` with one row per ex-date holding the split ratio (2.0 for 2:1),
+    the cash dividend and the price `factor` that adjusts earlier bars
+    (1/split times 1 - dividend/previous close). A dividend on the first bar
+    has no previous close in the frame, so its factor is NaN (unknown); see
+    `fill_factors` and `merge_actions`.
+    """
+    cols = [c for c in ACTION_COLUMNS if c in df.columns]
+    if not cols or "date" not in df.columns:
+        return df, empty_actions()
+    prices = df.drop(columns=cols)
+    frame = df.sort_values("date", kind="mergesort")
+    split = np.zeros(len(frame))
+    dividend = np.zeros(len(frame))
+    for col in cols:
+        values = pd.to_numeric(frame[col], errors="coerce").fillna(0).to_numpy()
+        if ACTION_COLUMNS[col] == "split":
+            split = np.where(values > 0, values, split)
+        else:
+            dividend = np.where(values > 0, values, dividend)
+    has_split = (split > 0) & (split != 1)
+    has_div = dividend > 0
+    mask = has_split | has_div
+    if not mask.any():
+        return prices, empty_actions()
+
+    close = (
+        pd.to_numeric(frame["close"], errors="coerce").to_numpy(dtype=float)
+        if "close" in frame.columns
+        else np.full(len(frame), np.nan)
+    )
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        div_factor = np.where(has_div, 1 - dividend / prev_close, 1.0)
+    unknown = has_div & ~np.isfinite(div_factor)
+    div_factor = np.where(unknown, np.nan, div_factor)
+    factor = np.where(has_split, 1 / np.where(has_split, split, 1), 1.0) * div_factor
+
+    actions = pd.DataFrame(
+        {
+            "date": pd.to_datetime(pd.Series(_days(frame["date"].to_numpy()))),
+            "split": np.where(has_split, split, 1.0),
+            "dividend": dividend,
+            "factor": factor,
+        }
+    )[mask].reset_index(drop=True)
+    return prices, actions
+
+
+def merge_actions(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Union two action lists, keeping the newest row for a repeated ex-date.
+
+    A newer row with an unknown (NaN) factor keeps the factor already stored
+    for that date.
+    """
+    frames = [f for f in (old, new) if f is not None and not f.empty]
+    if not frames:
+        return empty_actions()
+    merged = pd.concat(frames, ignore_index=True)
+    merged["date"] = pd.to_datetime(merged["date"])
+    merged = merged.sort_values("date", kind="mergesort")
+    # within a date rows are old-then-new, so a forward fill carries the
+    # stored factor into a newer unknown one
+    merged["factor"] = merged.groupby("date")["factor"].ffill()
+    merged = merged.drop_duplicates(subset=["date"], keep="last")
+    return merged[ACTION_FIELDS].reset_index(drop=True)
+
+
+def fill_factors(actions: pd.DataFrame, closes: pd.DataFrame) -> pd.DataFrame:
+    """Fill unknown dividend factors from stored raw closes.
+
+    `closes` has the stored (as traded) `date`/`close` bars. For each action
+    with a NaN factor the last close before its ex-date is converted to the
+    split-adjusted basis the provider reports dividends in, using every split
+    in `actions` after that bar. Actions with no earlier close stay unknown.
+    """
+    unknown = actions["factor"].isna().to_numpy()
+    if not unknown.any() or closes is None or closes.empty:
+        return actions
+    days = _days(closes["date"].to_numpy())
+    close = pd.to_numeric(closes["close"], errors="coerce").to_numpy(dtype=float)
+    ok = ~np.isnat(days) & np.isfinite(close) & (close > 0)
+    order = np.argsort(days[ok], kind="mergesort")
+    days, close = days[ok][order], close[ok][order]
+    ex = _days(actions["date"].to_numpy())
+    # last stored bar strictly before each ex-date
+    pos = np.searchsorted(days, ex, side="left") - 1
+    split = actions["split"].to_numpy(dtype=float)
+    dividend = actions["dividend"].to_numpy(dtype=float)
+    factor = actions["factor"].to_numpy(dtype=float).copy()
+    for i in np.flatnonzero(unknown & (pos >= 0)):
+        later = (ex > days[pos[i]]) & (split != 1)
+        prev = close[pos[i]] / np.prod(split[later])
+        factor[i] = (1 - dividend[i] / prev) / split[i]
+    return actions.assign(factor=factor)
+
+
+def build_index(actions: pd.DataFrame) -> Dict[str, List]:
+    """Cumulative factor index: bars dated before `dates[i]` use `price[i]`.
+
+    `price[i]`/`volume[i]` are the products of the factors of every action at
+    or after `dates[i]`; bars on or after the last ex-date use 1. An unknown
+    (NaN) factor only applies its split.
+    """
+    if actions is None or actions.empty:
+        return {"dates": [], "price": [], "volume": []}
+    actions = actions.sort_values("date", kind="mergesort")
+    factor = actions["factor"].to_numpy(dtype=float)
+    split = actions["split"].to_numpy(dtype=float)
+    unknown = np.isnan(factor)
+    if unknown.any():
+        logging.info(
+            "%d dividend(s) without a previous close; split only", unknown.sum()
+        )
+        factor = np.where(unknown, 1 / split, factor)
+    price = np.cumprod(factor[::-1])[::-1]
+    volume = np.cumprod(split[::-1])[::-1]
+    return {
+        "dates": [str(d) for d in _days(actions["date"].to_numpy())],
+        "price": price.tolist(),
+        "volume": volume.tolist(),
+    }
+
+
+def _row_factors(dates, index: Dict[str, List]) -> Tuple[np.ndarray, np.ndarray]:
+    ex = np.array(index["dates"], dtype="datetime64[D]")
+    # a bar is adjusted by every action whose ex-date is after it
+    pos = np.searchsorted(ex, _days(dates), side="right")
+    price = np.append(np.asarray(index["price"], dtype=float), 1.0)
+    volume = np.append(np.asarray(index["volume"], dtype=float), 1.0)
+    return price[pos], volume[pos]
+
+
+def apply_index(df: pd.DataFrame, index: Dict[str, List]) -> pd.DataFrame:
+    """Return `df` with prices/volumes adjusted through `index` (one multiply each)."""
+    if not index["dates"] or df.empty or "date" not in df.columns:
+        return df
+    price, volume = _row_factors(df["date"].to_numpy(), index)
+    out = df.copy()
+    cols = [c for c in PRICE_COLUMNS if c in out.columns]
+    if cols:
+        out[cols] = out[cols].to_numpy(dtype=float) * price[:, None]
+    for col in VOLUME_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].to_numpy(dtype=float) * volume
+    return out
+
+
+def to_raw(df: pd.DataFrame, actions: pd.DataFrame) -> pd.DataFrame:
+    """Undo the split adjustment a provider applied to a fetched frame.
+
+    Yahoo-style sources report prices split-adjusted as of the fetch date;
+    multiplying earlier bars back by the later split ratios gives the raw
+    traded prices that are stored. Dividends are not applied by those sources
+    (we fetch unadjusted closes), so they are left alone.
+    """
+    if actions is None or actions.empty:
+        return df
+    splits = actions[actions["split"] != 1.0]
+    if splits.empty:
+        return df
+    # inverse of a split-only index
+    inverse = splits.assign(factor=splits["split"], split=1 / splits["split"])
+    return apply_index(df, build_index(inverse))
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src import data
+from src.data import data_version, list_tickers
+from src.screener import load_panel
+from src.utils import WEEKENDS, load_holiday_calendar
+
+
+def trading_calendar(start, end) -> pd.DatetimeIndex:
+    """Trading days between `start` and `end` inclusive (weekends and holidays removed)."""
+    weekmask = " ".join(
+        day
+        for i, day in enumerate("Mon Tue Wed Thu Fri Sat Sun".split())
+        if i not in WEEKENDS
+    )
+    return pd.bdate_range(
+        start, end, freq="C", weekmask=weekmask, holidays=load_holiday_calendar()
+    )
+
+
+def return_panel(
+    tickers: Optional[Iterable[str]] = None, lookback: int = 260, max_fill: int = 5
+) -> pd.DataFrame:
+    """Aligned daily log returns (trading days x tickers) from the local store.
+
+    Closes are reindexed onto the trading calendar; a missing bar is
+    forward-filled for up to `max_fill` days, so the move shows up on the next
+    real bar instead of being dropped. Returns before a ticker's first bar, or
+    across longer gaps, are NaN; the moment functions below skip them pairwise.
+    """
+    panel = load_panel(tickers, columns=("close",), lookback=lookback + 1)
+    if not panel.tickers:
+        return pd.DataFrame()
+    closes = pd.DataFrame(
+        panel.column("close"),
+        index=pd.DatetimeIndex(panel.dates),
+        columns=panel.tickers,
+    )
+    calendar = trading_calendar(closes.index.min(), closes.index.max())
+    # keep bars that land on days missing from our calendar rather than drop data
+    closes = closes.reindex(calendar.union(closes.index)).ffill(limit=max_fill)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.log(closes).diff().iloc[1:]
+    return returns.tail(lookback)
+
+
+class _PairwiseSums:
+    """Window sums of a (T, N) return array over pairwise-complete rows.
+
+    Entry (i, j) of every sum only counts rows where both i and j have a
+    return, so missing returns neither enter as zeros nor drop the rows other
+    pairs share. Rows are added and dropped in O(N^2) each; values are
+    shifted by `shift` to keep the sums well-conditioned.
+    """
+
+    def __init__(self, block: np.ndarray, shift: np.ndarray):
+        self.shift = shift
+        self.reset(block)
+
+    def _terms(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.atleast_2d(rows)
+        valid = ~np.isnan(rows)
+        return np.where(valid, rows - self.shift, 0.0), valid.astype(float)
+
+    def reset(self, block: np.ndarray) -> None:
+        x, v = self._terms(block)
+        self.n = v.T @ v
+        # sx[i, j] / sxx[i, j]: sums of i's returns / squares on rows j also has
+        self.sx = x.T @ v
+        self.sxx = (x * x).T @ v
+        self.sxy = x.T @ x
+
+    def add(self, rows: np.ndarray, sign: float = 1.0) -> None:
+        x, v = self._terms(rows)
+        self.n += sign * (v.T @ v)
+        self.sx += sign * (x.T @ v)
+        self.sxx += sign * ((x * x).T @ v)
+        self.sxy += sign * (x.T @ x)
+
+    def drop(self, rows: np.ndarray) -> None:
+        self.add(rows, sign=-1.0)
+
+    def cov(self, min_periods: int = 2) -> np.ndarray:
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (self.sxy - self.sx * self.sx.T / n) / (n - 1)
+        cov[n < max(2, min_periods)] = np.nan
+        return cov
+
+    def corr(self, min_periods: int = 2) -> np.ndarray:
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # each side's variance over the rows the pair shares
+            var = np.clip((self.sxx - self.sx**2 / n) / (n - 1), 0, None)
+            corr = self.cov(min_periods) / np.sqrt(var * var.T)
+        diag = np.diag_indices_from(corr)
+        corr[diag] = np.where(np.isnan(np.diag(corr)), np.nan, 1.0)
+        return corr
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    # column means over the valid rows (0 for empty columns)
+    valid = ~np.isnan(x)
+    return np.where(valid, x, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+
+
+def _rolling_sums(
+    x: np.ndarray, window: int, resync: int
+) -> Iterator[Tuple[int, _PairwiseSums]]:
+    if window < 2:
+        raise ValueError("window must be >= 2")
+    if x.shape[0] < window:
+        return
+    sums = _PairwiseSums(x[:window], _shift(x))
+    for end in range(window, x.shape[0] + 1):
+        if end > window:
+            if (end - window) % resync == 0:
+                sums.reset(x[end - window : end])
+            else:
+                sums.add(x[end - 1])
+                sums.drop(x[end - 1 - window])
+        yield end - 1, sums
+
+
+def rolling_moments(
+    returns: np.ndarray, window: int, resync: int = 250, min_periods: int = 2
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield `(row, covariance)` for every full `window` of a (T, N) return array.
+
+    The window sums are updated in place as each new row is added and the
+    oldest dropped, so each step costs O(N^2) instead of O(window * N^2). The
+    sums are recomputed from scratch every `resync` steps to bound rounding
+    drift. `row` is the index of the last row in the window. NaN returns are
+    skipped pairwise; pairs sharing fewer than `min_periods` rows are NaN.
+    """
+    x = np.asarray(returns, dtype=float)
+    for row, sums in _rolling_sums(x, window, resync):
+        yield row, sums.cov(min_periods)
+
+
+# last window and its sums per (store, tickers, window, lookback): a refresh
+# that appends bars advances them by the new rows instead of rebuilding
+_WINDOW_SUMS: Dict[tuple, Tuple[pd.DataFrame, _PairwiseSums, int]] = {}
+_WINDOW_SUMS_LOCK = threading.Lock()
+_WINDOW_SUMS_MAX = 32
+_RESYNC = 250
+
+
+def _advance_window(key: tuple, block: pd.DataFrame) -> _PairwiseSums:
+    values = block.to_numpy(dtype=float)
+    n = len(block)
+    with _WINDOW_SUMS_LOCK:
+        prev = _WINDOW_SUMS.pop(key, None)
+        sums = None
+        if prev is not None:
+            old, sums, steps = prev
+            k = int((block.index > old.index[-1]).sum())
+            # reuse only if the rows still in the window are unchanged
+            kept = old.to_numpy(dtype=float)
+            if (
+                list(old.columns) == list(block.columns)
+                and len(old) == n
+                and k < n
+                and steps + k < _RESYNC
+                and old.index[k:].equals(block.index[: n - k])
+                and np.array_equal(kept[k:], values[: n - k], equal_nan=True)
+            ):
+                if k:
+                    sums.drop(kept[:k])
+                    sums.add(values[n - k :])
+                steps += k
+            else:
+                sums = None
+        if sums is None:
+            sums, steps = _PairwiseSums(values, _shift(values)), 0
+        _WINDOW_SUMS[key] = (block, sums, steps)
+        while len(_WINDOW_SUMS) > _WINDOW_SUMS_MAX:
+            _WINDOW_SUMS.pop(next(iter(_WINDOW_SUMS)))
+        return sums
+
+
+@lru_cache(maxsize=32)
+def _latest_moments(
+    store: str,
+    tickers: Tuple[str, ...],
+    versions: Tuple[int, ...],
+    window: int,
+    lookback: int,
+    min_periods: int,
+) -> Tuple[Tuple[str, ...], np.ndarray, np.ndarray]:
+    # `store` and `versions` are cache keys only: a merge bumps the version
+    # and misses here
+    returns = return_panel(tickers, lookback=lookback)
+    if returns.empty or len(returns) < window:
+        # not enough history: callers get an empty frame
+        return (), np.empty((0, 0)), np.empty((0, 0))
+    sums = _advance_window((store, tickers, window, lookback), returns.tail(window))
+    with _WINDOW_SUMS_LOCK:
+        cov, corr = sums.cov(min_periods), sums.corr(min_periods)
+    return tuple(returns.columns), cov, corr
+
+
+def _latest_frame(
+    tickers: Optional[Iterable[str]],
+    window: int,
+    lookback: int,
+    min_periods: int,
+    which: int,
+) -> pd.DataFrame:
+    names = tuple(tickers) if tickers is not None else tuple(list_tickers())
+    versions = tuple(data_version(t) for t in names)
+    store = str(data.DATA_DIR.resolve())
+    result = _latest_moments(store, names, versions, window, lookback, min_periods)
+    cols = list(result[0])
+    return pd.DataFrame(result[which].copy(), index=cols, columns=cols)
+
+
+def covariance_matrix(
+    tickers: Optional[Iterable[str]] = None,
+    window: int = 60,
+    lookback: int = 260,
+    min_periods: int = 2,
+) -> pd.DataFrame:
+    """Covariance of daily log returns over the last `window` trading days.
+
+    Each pair uses the rows where both tickers have a return; pairs sharing
+    fewer than `min_periods` rows are NaN. Cached per (tickers, data versions,
+    window, lookback), so it is recomputed only after one of the tickers is
+    written or merged; when that write only appended bars, the window sums
+    are advanced by the new rows rather than rebuilt.
+    """
+    return _latest_frame(tickers, window, lookback, min_periods, which=1)
+
+
+def correlation_matrix(
+    tickers: Optional[Iterable[str]] = None,
+    window: int = 60,
+    lookback: int = 260,
+    min_periods: int = 2,
+) -> pd.DataFrame:
+    """Correlation of daily log returns; see `covariance_matrix` for caching."""
+    return _latest_frame(tickers, window, lookback, min_periods, which=2)
+
+
+def rolling_correlation(
+    tickers: Optional[Iterable[str]] = None,
+    window: int = 60,
+    lookback: int = 260,
+    min_periods: int = 2,
+) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+    """Yield `(date, correlation matrix)` for each day with a full window."""
+    returns = return_panel(tickers, lookback=lookback)
+    cols = list(returns.columns)
+    for row, sums in _rolling_sums(returns.to_numpy(dtype=float), window, 250):
+        yield returns.index[row], pd.DataFrame(
+            sums.corr(min_periods), index=cols, columns=cols
+        )
@@ -1,25 +1,23 @@
 from typing import Dict
-from .data import read_parquet, fetch_and_update_parquet
+from .data import read_tail, fetch_and_update_parquet
+from .profiling import profile_calls
 
 
+@profile_calls()
 def get_prices(ticker: str, days: int = 90, refresh: bool = False) -> Dict:
     """Return last `days` records for `ticker`.
 
     If `refresh` is True, force a fetch-and-update of parquet from remote.
+    Only the trailing row groups of the stored history are read.
     """
     if refresh:
-        df = fetch_and_update_parquet(ticker, period="1y")
-    else:
-        try:
-            df = read_parquet(ticker)
-        except FileNotFoundError:
-            # auto-fetch and create parquet if missing
-            df = fetch_and_update_parquet(ticker, period="1y")
-
-    if len(df) < days:
-        subset = df
-    else:
-        subset = df.tail(days)
+        fetch_and_update_parquet(ticker, period="1y", materialize=False)
+    try:
+        subset = read_tail(ticker, days)
+    except FileNotFoundError:
+        # auto-fetch and create parquet if missing
+        fetch_and_update_parquet(ticker, period="1y", materialize=False)
+        subset = read_tail(ticker, days)
     # ensure date column
     if "date" in subset.columns:
         subset = subset.copy()
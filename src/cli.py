@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+# Heavy modules (pandas, pyarrow, provider libraries) are imported inside the
+# command handlers so `python -m src --help` starts without loading them.
+
+
+def _read_tickers(args: argparse.Namespace) -> List[str]:
+    tickers = list(args.tickers)
+    if args.file:
+        for line in Path(args.file).read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                tickers.append(line)
+    # keep first occurrence order
+    return list(dict.fromkeys(t.upper() for t in tickers))
+
+
+def _providers(args: argparse.Namespace) -> Optional[list]:
+    if not args.replay_dir:
+        return None
+    from src.providers import LocalProvider
+
+    return [LocalProvider(args.replay_dir)]
+
+
+def _forecast_params(args: argparse.Namespace) -> dict:
+    # unset flags fall back to the dashboard's params, so CLI forecasts share
+    # its forecast-store entries
+    from src.forecast_store import DASHBOARD_PARAMS
+
+    params = dict(DASHBOARD_PARAMS)
+    for name in params:
+        value = getattr(args, name, None)
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def _cmd_fetch(args: argparse.Namespace) -> int:
+    from src.data import fetch_and_update_parquet, read_tail
+
+    fetch_and_update_parquet(
+        args.ticker,
+        period=args.period,
+        materialize=False,
+        providers=_providers(args),
+    )
+    last = read_tail(args.ticker, 1)
+    print(f"{args.ticker}: updated, last bar {last['date'].iloc[-1]}")
+    return 0
+
+
+def _cmd_refresh_many(args: argparse.Namespace) -> int:
+    from src.data import fetch_and_update_many
+
+    tickers = _read_tickers(args)
+    if not tickers:
+        print("no tickers given", file=sys.stderr)
+        return 2
+    # bulk-capable providers fetch the whole list in one call where possible
+    updated = set(
+        fetch_and_update_many(
+            tickers, period=args.period, providers=_providers(args), delay=args.delay
+        )
+    )
+    failed = [t for t in tickers if t not in updated]
+    for ticker in failed:
+        print(f"{ticker}: failed", file=sys.stderr)
+    print(f"refreshed {len(tickers) - len(failed)}/{len(tickers)}")
+    if args.precompute:
+        from src.forecast_store import precompute_forecasts
+
+        done = [t for t in tickers if t not in failed]
+        warmed = precompute_forecasts(done, **_forecast_params(args))
+        print(f"precomputed forecasts for {len(warmed)}/{len(done)}")
+    return 1 if failed else 0
+
+
+def _cmd_predict(args: argparse.Namespace) -> int:
+    from datetime import date
+
+    from src.forecast_store import get_forecast
+    from src.utils import next_trading_days
+
+    params = _forecast_params(args)
+    result = get_forecast(args.ticker, **params)
+    last_date = date.fromisoformat(result["last_date"])
+    days = next_trading_days(last_date, params["days"])
+    for day, value in zip(days, result["values"]):
+        print(f"{day.isoformat()}\t{value:.4f}")
+    return 0
+
+
+def _cmd_show(args: argparse.Namespace) -> int:
+    from src.data import read_tail
+
+    df = read_tail(args.ticker, args.rows)
+    print(df.to_string(index=False))
+    return 0
+
+
+def _forecast_args(p: argparse.ArgumentParser) -> None:
+    # defaults live in forecast_store.DASHBOARD_PARAMS (see _forecast_params)
+    p.add_argument("--days", type=int, help="forecast horizon (dashboard: 3)")
+    p.add_argument("--window", type=int, help="SMA window (dashboard: 3)")
+    p.add_argument(
+        "--n-paths", type=int, help="Monte Carlo paths for the band (dashboard: 10000)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src", description="US stock price data and forecast tools"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay = argparse.ArgumentParser(add_help=False)
+    replay.add_argument(
+        "--replay-dir", help="serve prices from recorded files instead of network"
+    )
+
+    p = sub.add_parser(
+        "fetch", parents=[replay], help="fetch one ticker and merge into data/"
+    )
+    p.add_argument("ticker")
+    p.add_argument("--period", default="1y")
+    p.set_defaults(func=_cmd_fetch)
+
+    p = sub.add_parser(
+        "refresh-many", parents=[replay], help="fetch and merge several tickers"
+    )
+    p.add_argument("tickers", nargs="*")
+    p.add_argument("--file", help="file with one ticker per line")
+    p.add_argument("--period", default="1y")
+    p.add_argument(
+        "--delay",
+        type=float,
+        default=1.0,
+        help="seconds between tickers fetched one at a time (after bulk)",
+    )
+    p.add_argument(
+        "--precompute", action="store_true", help="warm the forecast store after"
+    )
+    _forecast_args(p)
+    p.set_defaults(func=_cmd_refresh_many)
+
+    p = sub.add_parser("predict", help="print the SMA forecast from stored data")
+    p.add_argument("ticker")
+    _forecast_args(p)
+    p.set_defaults(func=_cmd_predict)
+
+    p = sub.add_parser("show", help="print the last stored rows")
+    p.add_argument("ticker")
+    p.add_argument("--rows", type=int, default=10)
+    p.set_defaults(func=_cmd_show)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point for `python -m src`."""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except FileNotFoundError as exc:
+        print(f"{exc}; run `python -m src fetch` first", file=sys.stderr)
+        return 1
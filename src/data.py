@@ -3,21 +3,39 @@ from __future__ import annotations
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import pandas as pd
-import yfinance as yf
-import requests
-import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import os
 import time
 import tempfile
 import random
 import logging
-# typing imports not required
 
+from src import adjustments
+from src.profiling import profile_calls
+from src.providers import (
+    PriceProvider,
+    ProviderError,
+    RateLimitError,
+    default_providers,
+    select_providers,
+)
+from src.validation import coerce_numeric, validate_batch
+
+# Created lazily by the writers below; importing this module has no side effects.
 DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
+
+# Rows per parquet row group / Arrow record batch. Bounds the memory used by
+# iter_prices and the streaming merge in fetch_and_update_parquet.
+BATCH_ROWS = 65_536
+
+# Provider columns adjusted as of the fetch date; they go stale after the next
+# split, so they are not stored and are hidden from reads of older stores.
+STALE_COLUMNS = ("adj_close",)
 
 
 def _meta_path(ticker: str) -> Path:
@@ -28,9 +46,19 @@ def _data_path(ticker: str) -> Path:
     return DATA_DIR / f"stock_{ticker}.parquet"
 
 
+def list_tickers() -> List[str]:
+    """Return the tickers that have a stored parquet file, sorted."""
+    return sorted(
+        p.name[len("stock_") : -len(".parquet")]
+        for p in DATA_DIR.glob("stock_*.parquet")
+    )
+
+
 def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
-    # normalize column names to lower-case expected names and ensure date
-    df = df.reset_index()
+    # normalize column names to lower-case expected names and ensure date;
+    # yfinance returns a Date index, CSV/replay frames a plain RangeIndex
+    unnamed = isinstance(df.index, pd.RangeIndex) and df.index.name is None
+    df = df.reset_index(drop=unnamed)
     df.rename(
         columns={
             "Date": "date",
@@ -54,135 +82,176 @@ def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def fetch_prices(ticker: str, period: str = "1y", max_retries: int = 4) -> pd.DataFrame:
-    """Fetch historical prices using yfinance with retries and fallback.
+def fetch_prices(
+    ticker: str,
+    period: str = "1y",
+    max_retries: int = 4,
+    providers: Optional[Sequence[PriceProvider]] = None,
+    interval: str = "1d",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Fetch historical prices from the cheapest capable provider, with retries.
 
-    This function attempts to be resilient to transient network errors and
-    provider rate-limiting (HTTP 429). It will retry with exponential backoff
-    and jitter. If `Ticker.history` returns empty, it attempts a `yf.download`
-    fallback. Raises ValueError when no data is returned after retries.
+    `providers` defaults to yfinance followed by the Yahoo CSV endpoint. They
+    are tried cheapest first; when all of them fail the chain is retried with
+    exponential backoff and jitter, waiting much longer when a provider
+    reported rate limiting (HTTP 429). Raises ValueError when no provider can
+    serve the request and re-raises the last provider error after retries.
     """
     if not ticker or not isinstance(ticker, str):
         raise ValueError("ticker must be a non-empty string")
 
-    attempt = 0
-    last_exc: Optional[Exception] = None
-    while attempt < max_retries:
-        attempt += 1
-        try:
-            yf_ticker = yf.Ticker(ticker)
-            df = yf_ticker.history(period=period)
-            if df is None or df.empty:
-                # try fallback to yf.download which sometimes behaves differently
-                df = yf.download(ticker, period=period, progress=False)
-            # final fallback: try direct CSV download from Yahoo Finance to detect 429
-            if df is None or df.empty:
-                try:
-                    url = (
-                        f"https://query1.finance.yahoo.com/v7/finance/download/{ticker}"
-                        f"?period1=0&period2=9999999999&interval=1d&events=history"
-                    )
-                    headers = {"User-Agent": "python-requests/1.0"}
-                    resp = requests.get(url, headers=headers, timeout=10)
-                    if resp.status_code == 429:
-                        # save a small debug copy of the response body to help diagnosis
-                        try:
-                            dbg = DATA_DIR / f"debug_{ticker}.txt"
-                            dbg.write_text(resp.text[:4096])
-                        except Exception:
-                            pass
-                        raise RuntimeError(
-                            f"Yahoo Finance rate limited (HTTP 429) when fetching {ticker}"
-                        )
-                    resp.raise_for_status()
-                    text = resp.text
-                    if not text:
-                        raise ValueError("Empty response from Yahoo download endpoint")
-                    df = pd.read_csv(io.StringIO(text), parse_dates=["Date"])
-                except Exception:
-                    # allow outer handler to process/backoff
-                    pass
-            if df is None or df.empty:
-                raise ValueError(f"No data for ticker {ticker} (attempt {attempt})")
-            return _normalize_df(df)
-        except Exception as exc:
-            last_exc = exc
-            # If yfinance failed due to unexpected/empty response (JSON parse),
-            # try a direct CSV fetch immediately to detect HTTP 429 or recoverable CSV.
-            emsg = str(exc).lower()
-            if (
-                "expecting value" in emsg
-                or "no json object" in emsg
-                or "no price data found" in emsg
-                or "empty response" in emsg
-            ):
-                try:
-                    url = (
-                        f"https://query1.finance.yahoo.com/v7/finance/download/{ticker}"
-                        f"?period1=0&period2=9999999999&interval=1d&events=history"
-                    )
-                    # use a browser-like user-agent to reduce automated-blocking
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-                    }
-                    resp = requests.get(url, headers=headers, timeout=10)
-                    if resp.status_code == 429:
-                        logging.warning(
-                            "Detected HTTP 429 for %s via direct CSV fetch", ticker
-                        )
-                        raise RuntimeError(
-                            f"Yahoo Finance rate limited (HTTP 429) when fetching {ticker}"
-                        )
-                    resp.raise_for_status()
-                    text = resp.text
-                    if text:
-                        try:
-                            df = pd.read_csv(io.StringIO(text), parse_dates=["Date"])
-                            return _normalize_df(df)
-                        except Exception:
-                            # if parsing fails, fall through to retry/backoff
-                            pass
-                except Exception as csv_exc:
-                    # attach additional context but continue with original flow
-                    logging.info(
-                        "Direct CSV attempt for %s failed: %s", ticker, csv_exc
-                    )
-                    last_exc = csv_exc
-            # detect rate-limit hints in the exception or message
-            msg = str(exc).lower()
-            if "429" in msg or "too many requests" in msg or "rate" in msg:
-                # when rate-limited, wait longer: exponential backoff with a larger cap
-                # cap at 30 minutes (1800s) to avoid hammering the endpoint
-                wait = min(1800, (60 * (2 ** (attempt - 1))) + random.random())
-                logging.warning(
-                    "Rate limited when fetching %s (attempt %d), sleeping %.1fs",
-                    ticker,
-                    attempt,
-                    wait,
+    if providers is None:
+        providers = default_providers(debug_dir=DATA_DIR)
+    chain = select_providers(
+        providers,
+        ranges=start is not None or end is not None,
+        intervals=interval != "1d",
+    )
+    if not chain:
+        raise ValueError(f"No provider supports this request for {ticker}")
+
+    last_exc: Exception = ValueError(f"Failed to fetch prices for {ticker}")
+    for attempt in range(1, max_retries + 1):
+        rate_limited = False
+        for provider in chain:
+            try:
+                df = provider.fetch(
+                    ticker, period=period, interval=interval, start=start, end=end
                 )
-                time.sleep(wait)
+            except RateLimitError as exc:
+                logging.warning("%s rate limited for %s", provider.name, ticker)
+                rate_limited = True
+                last_exc = exc
                 continue
-            # for other transient network issues, backoff and retry
-            if attempt < max_retries:
-                wait = (2**attempt) + random.random()
-                logging.info(
-                    "fetch_prices transient error for %s: %s (attempt %d), retrying in %.1fs",
-                    ticker,
-                    exc,
-                    attempt,
-                    wait,
-                )
-                time.sleep(wait)
+            except ProviderError as exc:
+                logging.info("%s failed for %s: %s", provider.name, ticker, exc)
+                last_exc = exc
                 continue
-            # exhausted retries
-            logging.exception(
-                "fetch_prices failed for %s after %d attempts", ticker, attempt
+            if df is not None and not df.empty:
+                return _normalize_df(df)
+            last_exc = ValueError(f"No data for ticker {ticker} (attempt {attempt})")
+        if attempt == max_retries:
+            break
+        if rate_limited:
+            # when rate-limited, wait longer: exponential backoff with a larger cap
+            # cap at 30 minutes (1800s) to avoid hammering the endpoint
+            wait = min(1800, (60 * (2 ** (attempt - 1))) + random.random())
+            logging.warning(
+                "Rate limited when fetching %s (attempt %d), sleeping %.1fs",
+                ticker,
+                attempt,
+                wait,
+            )
+        else:
+            wait = (2**attempt) + random.random()
+            logging.info(
+                "fetch_prices transient error for %s: %s (attempt %d), retrying in %.1fs",
+                ticker,
+                last_exc,
+                attempt,
+                wait,
+            )
+        time.sleep(wait)
+    logging.error("fetch_prices failed for %s after %d attempts", ticker, max_retries)
+    raise last_exc
+
+
+def fetch_prices_many(
+    tickers: Sequence[str],
+    period: str = "1y",
+    providers: Optional[Sequence[PriceProvider]] = None,
+    max_retries: int = 1,
+    delay: float = 0.0,
+) -> Dict[str, pd.DataFrame]:
+    """Fetch several tickers, using bulk-capable providers first.
+
+    Bulk providers are tried cheapest first for whatever is still missing;
+    leftovers fall back to `fetch_prices` one at a time, `delay` seconds
+    apart. After a rate-limited ticker the pause grows (60s, doubling, capped
+    at 30 minutes) and drops back to `delay` after the next success. Tickers
+    that cannot be fetched are logged and left out of the result.
+    """
+    if providers is None:
+        providers = default_providers(debug_dir=DATA_DIR)
+    remaining = list(dict.fromkeys(tickers))
+    out: Dict[str, pd.DataFrame] = {}
+    for provider in select_providers(providers, bulk=True):
+        if not remaining:
+            break
+        try:
+            got = provider.fetch_many(remaining, period=period)
+        except ProviderError as exc:
+            logging.info("%s bulk fetch failed: %s", provider.name, exc)
+            continue
+        for ticker, df in got.items():
+            out[ticker] = _normalize_df(df)
+        remaining = [t for t in remaining if t not in out]
+    pause = delay
+    for i, ticker in enumerate(remaining):
+        if i and pause > 0:
+            time.sleep(pause)
+        try:
+            out[ticker] = fetch_prices(
+                ticker, period=period, providers=providers, max_retries=max_retries
+            )
+            pause = delay
+        except RateLimitError as exc:
+            pause = min(1800, max(60, pause * 2))
+            logging.warning(
+                "fetch_prices_many: %s rate limited (%s), pausing %.0fs",
+                ticker,
+                exc,
+                pause,
             )
-            raise
-    # if we exit loop without returning, raise the last exception or a generic error
-    if last_exc:
-        raise last_exc
-    raise ValueError(f"Failed to fetch prices for {ticker}")
+        except Exception as exc:
+            logging.warning("fetch_prices_many skipped %s: %s", ticker, exc)
+    return out
+
+
+def read_meta(ticker: str) -> Dict:
+    """Return the JSON sidecar for `ticker`, or an empty dict when missing."""
+    try:
+        return json.loads(_meta_path(ticker).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def data_version(ticker: str) -> int:
+    """Return the stored data version for `ticker` (0 when never written).
+
+    The version is bumped on every write/merge, so it can key caches derived
+    from the stored history.
+    """
+    try:
+        return int(read_meta(ticker).get("data_version", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _holds_adjusted_prices(ticker: str) -> bool:
+    # stores written before prices were kept as traded (yfinance auto_adjust=True)
+    # have no "prices" marker; their closes already carry splits and dividends
+    return _data_path(ticker).exists() and read_meta(ticker).get("prices") != "raw"
+
+
+def _write_meta(ticker: str, rows: int, meta: Dict | None = None) -> None:
+    meta = meta or {}
+    meta.setdefault("written_at", datetime.utcnow().isoformat())
+    meta.setdefault("rows", int(rows))
+    meta["data_version"] = data_version(ticker) + 1
+    _meta_path(ticker).write_text(json.dumps(meta, ensure_ascii=False))
+
+
+def _tmp_parquet_path(ticker: str) -> str:
+    # ensure directory exists
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_fd, tmp_path = tempfile.mkstemp(
+        suffix=".parquet", prefix=f"{ticker}-", dir=DATA_DIR
+    )
+    os.close(tmp_fd)
+    return tmp_path
 
 
 def write_parquet(ticker: str, df: pd.DataFrame, meta: Dict | None = None) -> Path:
@@ -192,16 +261,12 @@ def write_parquet(ticker: str, df: pd.DataFrame, meta: Dict | None = None) -> Pa
     """
     if df is None or df.empty:
         raise ValueError("df must be a non-empty DataFrame")
+    meta = {**(meta or {}), "prices": "raw"}
     path = _data_path(ticker)
-    # ensure directory exists
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
     # Write to temp file then atomically move into place to avoid half-written files
-    tmp_fd, tmp_path = tempfile.mkstemp(
-        suffix=".parquet", prefix=f"{ticker}-", dir=DATA_DIR
-    )
-    os.close(tmp_fd)
+    tmp_path = _tmp_parquet_path(ticker)
     try:
-        df.to_parquet(tmp_path, index=False)
+        df.to_parquet(tmp_path, index=False, row_group_size=BATCH_ROWS)
         os.replace(tmp_path, path)
     finally:
         if os.path.exists(tmp_path):
@@ -210,21 +275,13 @@ def write_parquet(ticker: str, df: pd.DataFrame, meta: Dict | None = None) -> Pa
             except Exception:
                 pass
 
-    meta = meta or {}
-    meta.setdefault("written_at", datetime.utcnow().isoformat())
-    meta.setdefault("rows", int(len(df)))
-    _meta_path(ticker).write_text(json.dumps(meta, ensure_ascii=False))
+    _write_meta(ticker, len(df), meta)
     return path
 
 
-def read_parquet(ticker: str) -> pd.DataFrame:
-    """Read stored parquet for a ticker. Raises FileNotFoundError when missing."""
-    path = _data_path(ticker)
-    if not path.exists():
-        raise FileNotFoundError(f"No data file for ticker {ticker}")
-    df = pd.read_parquet(path)
+def _normalize_dates(df: pd.DataFrame) -> pd.DataFrame:
     # normalize date column type if present
-    if "date" in df.columns:
+    if "date" in df.columns and df["date"].dtype.kind != "M":
         try:
             df["date"] = pd.to_datetime(df["date"])
         except Exception:
@@ -233,56 +290,435 @@ def read_parquet(ticker: str) -> pd.DataFrame:
     return df
 
 
-def fetch_and_update_parquet(ticker: str, period: str = "1y") -> pd.DataFrame:
+def _actions_path(ticker: str) -> Path:
+    return DATA_DIR / f"stock_{ticker}.actions.json"
+
+
+def _read_actions_file(ticker: str) -> Dict:
+    try:
+        return json.loads(_actions_path(ticker).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def read_actions(ticker: str) -> pd.DataFrame:
+    """Return the stored splits/dividends for `ticker` (empty when none)."""
+    records = _read_actions_file(ticker).get("actions")
+    if not records:
+        return adjustments.empty_actions()
+    actions = pd.DataFrame.from_records(records, columns=adjustments.ACTION_FIELDS)
+    actions["date"] = pd.to_datetime(actions["date"])
+    return actions
+
+
+def _write_actions(ticker: str, actions: pd.DataFrame) -> None:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    records = actions.assign(date=actions["date"].dt.strftime("%Y-%m-%d"))
+    payload = {
+        "actions": records.to_dict(orient="records"),
+        "index": adjustments.build_index(actions),
+    }
+    _actions_path(ticker).write_text(json.dumps(payload, ensure_ascii=False))
+
+
+def add_actions(ticker: str, actions: pd.DataFrame) -> None:
+    """Merge splits/dividends into the stored action list for `ticker`.
+
+    `actions` has `date`, `split` (ratio, 1 for none), `dividend` and the
+    price `factor` (see `adjustments.extract_actions`). Stored prices are not
+    touched; reads pick up the new factors and the data version is bumped so
+    derived caches are invalidated.
+    """
+    _write_actions(ticker, adjustments.merge_actions(read_actions(ticker), actions))
+    meta = read_meta(ticker)
+    meta["actions_at"] = datetime.utcnow().isoformat()
+    _write_meta(ticker, meta.get("rows", 0), meta)
+
+
+def _adjustment_index(ticker: str) -> Dict[str, List]:
+    index = _read_actions_file(ticker).get("index") or {"dates": []}
+    if index["dates"] and _holds_adjusted_prices(ticker):
+        # not migrated yet: applying the index would adjust twice
+        return {"dates": []}
+    return index
+
+
+def _read_columns(
+    columns: Optional[Sequence[str]], adjust: bool, index: Dict
+) -> Tuple[Optional[List[str]], bool]:
+    # adjusting needs `date`; read it even if the caller did not ask for it
+    if columns is None:
+        return None, False
+    cols = list(columns)
+    if adjust and index["dates"] and "date" not in cols:
+        return cols + ["date"], True
+    return cols, False
+
+
+def _adjusted(df: pd.DataFrame, index: Dict, drop_date: bool) -> pd.DataFrame:
+    df = adjustments.apply_index(_normalize_dates(df), index)
+    # action columns only linger in stores written before the action file
+    stale = (*STALE_COLUMNS, *adjustments.ACTION_COLUMNS)
+    drop = [c for c in stale if c in df.columns]
+    if drop_date:
+        drop.append("date")
+    return df.drop(columns=drop) if drop else df
+
+
+def _stored_closes(ticker: str) -> pd.DataFrame:
+    # raw date/close bars already in the store (empty when there are none)
+    path = _data_path(ticker)
+    if not path.exists():
+        return pd.DataFrame(columns=["date", "close"])
+    try:
+        return pd.read_parquet(path, columns=["date", "close"])
+    except Exception as exc:
+        logging.info("reading stored closes for %s failed: %s", ticker, exc)
+        return pd.DataFrame(columns=["date", "close"])
+
+
+def read_parquet(ticker: str, adjust: bool = True) -> pd.DataFrame:
+    """Read stored parquet for a ticker. Raises FileNotFoundError when missing.
+
+    Prices are stored as traded; with `adjust` (default) the ticker's
+    split/dividend factor index is applied on read.
+    """
+    path = _data_path(ticker)
+    if not path.exists():
+        raise FileNotFoundError(f"No data file for ticker {ticker}")
+    index = _adjustment_index(ticker) if adjust else {"dates": []}
+    return _adjusted(pd.read_parquet(path), index, False)
+
+
+def iter_prices(
+    ticker: str,
+    batch_rows: int = BATCH_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    adjust: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """Iterate stored history for `ticker` in chunks of at most `batch_rows` rows.
+
+    Chunks are read as Arrow record batches, so only one batch is held in
+    memory at a time. `columns` restricts the columns read; `adjust` applies
+    split/dividend factors as in `read_parquet`. Raises FileNotFoundError
+    when missing.
+    """
+    if batch_rows < 1:
+        raise ValueError("batch_rows must be >= 1")
+    path = _data_path(ticker)
+    if not path.exists():
+        raise FileNotFoundError(f"No data file for ticker {ticker}")
+    index = _adjustment_index(ticker) if adjust else {"dates": []}
+    cols, drop_date = _read_columns(columns, adjust, index)
+
+    def _gen() -> Iterator[pd.DataFrame]:
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=cols):
+            yield _adjusted(batch.to_pandas(), index, drop_date)
+
+    return _gen()
+
+
+def read_tail(
+    ticker: str,
+    rows: int,
+    columns: Optional[Sequence[str]] = None,
+    adjust: bool = True,
+) -> pd.DataFrame:
+    """Read the last `rows` stored records for `ticker`.
+
+    Only the trailing row groups needed to cover `rows` are read; `adjust`
+    applies split/dividend factors as in `read_parquet`. Raises
+    FileNotFoundError when missing.
+    """
+    path = _data_path(ticker)
+    if not path.exists():
+        raise FileNotFoundError(f"No data file for ticker {ticker}")
+    index = _adjustment_index(ticker) if adjust else {"dates": []}
+    cols, drop_date = _read_columns(columns, adjust, index)
+    pf = pq.ParquetFile(path)
+    tables: List[pa.Table] = []
+    have = 0
+    for i in reversed(range(pf.num_row_groups)):
+        if have >= rows:
+            break
+        table = pf.read_row_group(i, columns=cols)
+        tables.append(table)
+        have += table.num_rows
+    if not tables:
+        return _normalize_dates(pf.schema_arrow.empty_table().to_pandas())
+    table = pa.concat_tables(reversed(tables))
+    table = table.slice(max(0, table.num_rows - max(0, rows)))
+    return _adjusted(table.to_pandas(), index, drop_date)
+
+
+def _align_to_store_tz(ticker: str, new_df: pd.DataFrame) -> pd.DataFrame:
+    # yfinance dates are tz-aware (exchange time), CSV/replay dates naive. Arrow
+    # would cast naive dates to the store's zone as UTC and shift the trading
+    # day, so match the store's convention on the same wall-clock date instead.
+    path = _data_path(ticker)
+    dates = new_df["date"]
+    if not path.exists() or dates.dtype.kind != "M":
+        return new_df
+    try:
+        stored = pq.read_schema(path).field("date").type
+    except Exception:
+        return new_df
+    if not pa.types.is_timestamp(stored):
+        return new_df
+    if stored.tz and dates.dt.tz is None:
+        dates = dates.dt.tz_localize(
+            stored.tz, ambiguous="NaT", nonexistent="shift_forward"
+        )
+    elif not stored.tz and dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    else:
+        return new_df
+    return new_df.assign(date=dates)
+
+
+def _merged_schema(existing: pa.Schema, incoming: pa.Schema) -> pa.Schema:
+    # keep the stored column order/types, widening where the fetch disagrees
+    fields = []
+    for field in existing.remove_metadata():
+        if field.name in incoming.names:
+            other = incoming.field(field.name).type
+            if pa.types.is_null(field.type):
+                field = field.with_type(other)
+            elif pa.types.is_integer(field.type) and pa.types.is_floating(other):
+                field = field.with_type(pa.float64())
+        fields.append(field)
+    for field in incoming.remove_metadata():
+        if field.name not in existing.names:
+            fields.append(field)
+    return pa.schema(fields)
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    arrays = [
+        (
+            table.column(f.name).cast(f.type)
+            if f.name in table.column_names
+            else pa.nulls(table.num_rows, f.type)
+        )
+        for f in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _merge_streaming(ticker: str, new_df: pd.DataFrame) -> Optional[int]:
+    """Merge `new_df` into the stored parquet one record batch at a time.
+
+    The stored file must be sorted by `date`, which is how this module writes
+    it. Returns the number of rows written, or None when the store cannot be
+    streamed (no `date` column or out-of-order rows) so the caller can fall
+    back to an in-memory merge.
+    """
+    path = _data_path(ticker)
+    pf = pq.ParquetFile(path)
+    if "date" not in pf.schema_arrow.names:
+        return None
+
+    incoming = new_df.sort_values("date", kind="mergesort")
+    incoming = incoming.drop_duplicates(subset=["date"], keep="last")
+    incoming_table = pa.Table.from_pandas(incoming, preserve_index=False)
+    schema = _merged_schema(pf.schema_arrow, incoming_table.schema)
+    incoming_table = _conform(incoming_table, schema)
+    new_dates = incoming_table.column("date")
+    new_dates_np = new_dates.to_numpy()
+
+    tmp_path = _tmp_parquet_path(ticker)
+    rows = 0
+    pos = 0
+    last = None
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for batch in pf.iter_batches(batch_size=BATCH_ROWS):
+                chunk = _conform(pa.Table.from_batches([batch]), schema)
+                dates = chunk.column("date").to_numpy()
+                if len(dates) == 0:
+                    continue
+                # NaT compares False, so null dates also take the fallback path
+                if not (dates[1:] >= dates[:-1]).all() or (
+                    last is not None and not dates[0] >= last
+                ):
+                    return None
+                last = dates[-1]
+                keep = pc.invert(pc.is_in(chunk.column("date"), value_set=new_dates))
+                end = int(new_dates_np.searchsorted(last, side="right"))
+                out = pa.concat_tables(
+                    [chunk.filter(keep), incoming_table.slice(pos, end - pos)]
+                ).sort_by("date")
+                pos = end
+                writer.write_table(out, row_group_size=BATCH_ROWS)
+                rows += out.num_rows
+            tail = incoming_table.slice(pos)
+            if tail.num_rows:
+                writer.write_table(tail, row_group_size=BATCH_ROWS)
+                rows += tail.num_rows
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+    return rows
+
+
+def _merge_in_memory(ticker: str, new_df: pd.DataFrame) -> pd.DataFrame:
+    try:
+        existing = read_parquet(ticker, adjust=False)
+    except Exception:
+        # if read failed for any reason, treat as missing
+        existing = pd.DataFrame()
+
+    if existing is None or existing.empty:
+        return new_df.copy()
+    # concat and deduplicate by date, prefer newest rows
+    merged = pd.concat([existing, new_df], ignore_index=True, sort=False)
+    if "date" in merged.columns:
+        merged["date"] = pd.to_datetime(merged["date"])
+        merged.sort_values(by="date", inplace=True, kind="mergesort")
+        return merged.drop_duplicates(subset=["date"], keep="last").reset_index(
+            drop=True
+        )
+    # fallback: drop exact-duplicate rows
+    return merged.drop_duplicates().reset_index(drop=True)
+
+
+def _store_fetched(
+    ticker: str,
+    new_df: pd.DataFrame,
+    materialize: bool = True,
+    validation: Optional[Dict] = None,
+) -> Optional[pd.DataFrame]:
+    # validate what the provider returned before it reaches the store
+    if validation is None:
+        validation = validate_batch({ticker: new_df})[ticker]
+    if not validation["ok"]:
+        logging.warning("data-quality issues for %s: %s", ticker, validation)
+    new_df = coerce_numeric(new_df)
+    # Ensure date column is datetime
+    if "date" in new_df.columns:
+        new_df["date"] = pd.to_datetime(new_df["date"])
+        new_df = _align_to_store_tz(ticker, new_df)
+
+    # an adjusted legacy store cannot be merged with raw bars: replace it
+    replace = _holds_adjusted_prices(ticker)
+    if replace:
+        logging.info("replacing adjusted legacy store for %s", ticker)
+
+    # keep splits/dividends out of the price rows and store prices as traded
+    new_df = new_df.drop(columns=list(STALE_COLUMNS), errors="ignore")
+    new_df, actions = adjustments.extract_actions(new_df)
+    if not actions.empty:
+        actions = adjustments.merge_actions(read_actions(ticker), actions)
+        if actions["factor"].isna().any() and not replace:
+            # e.g. a dividend on the first fetched bar: use the stored close
+            actions = adjustments.fill_factors(actions, _stored_closes(ticker))
+        new_df = adjustments.to_raw(new_df, actions)
+        _write_actions(ticker, actions)
+
+    meta = {
+        "merged_at": datetime.utcnow().isoformat(),
+        "validation": validation,
+        "prices": "raw",
+    }
+    rows = None
+    if not replace and _data_path(ticker).exists() and "date" in new_df.columns:
+        try:
+            rows = _merge_streaming(ticker, new_df)
+        except Exception as exc:
+            # unreadable store or incompatible schema: use the in-memory path
+            logging.info("streaming merge for %s failed: %s", ticker, exc)
+            rows = None
+    if rows is not None:
+        _write_meta(ticker, rows, meta)
+        return read_parquet(ticker) if materialize else None
+
+    if not replace and _data_path(ticker).exists():
+        merged = _merge_in_memory(ticker, new_df)
+    else:
+        merged = new_df.copy()
+
+    # write back
+    write_parquet(ticker, merged, meta=meta)
+    if not materialize:
+        return None
+    return _adjusted(merged, _adjustment_index(ticker), False)
+
+
+@profile_calls()
+def fetch_and_update_parquet(
+    ticker: str,
+    period: str = "1y",
+    materialize: bool = True,
+    providers: Optional[Sequence[PriceProvider]] = None,
+) -> Optional[pd.DataFrame]:
     """Fetch latest data for `ticker` and merge with existing parquet.
 
-    - If parquet exists: read it, fetch remote, concat, deduplicate by `date` and overwrite parquet.
+    - If parquet exists: stream it batch by batch, replacing stored rows whose
+      `date` was re-fetched and interleaving new rows, so peak memory is bounded
+      by the batch size rather than the history length. Stores that are not
+      sorted by date fall back to an in-memory concat/dedupe.
     - If parquet does not exist: fetch and write a new parquet file.
 
-    Returns the up-to-date DataFrame that was written.
+    A store written before prices were kept as traded (already adjusted) is
+    refetched with `period="max"` once and replaced rather than merged.
+
+    `providers` is passed through to `fetch_prices`. Returns the up-to-date
+    DataFrame that was written, or None when `materialize` is False (use
+    `iter_prices`/`read_tail` to read it back).
     """
+    extra = {"providers": providers} if providers is not None else {}
+    if _holds_adjusted_prices(ticker):
+        # refetch the whole history once to replace the adjusted legacy store
+        period = "max"
     # Fetch remote data (may raise ValueError on no data). Add simple retry/backoff.
     retries = 3
     delay = 1.0
     new_df = None
     for attempt in range(1, retries + 1):
         try:
-            new_df = fetch_prices(ticker, period=period)
+            new_df = fetch_prices(ticker, period=period, **extra)
             break
         except Exception:
             if attempt == retries:
                 raise
             time.sleep(delay)
             delay *= 2
-    # Ensure date column is datetime
-    if "date" in new_df.columns:
-        new_df["date"] = pd.to_datetime(new_df["date"])
+    return _store_fetched(ticker, new_df, materialize=materialize)
 
-    path = _data_path(ticker)
-    if path.exists():
-        try:
-            existing = read_parquet(ticker)
-        except Exception:
-            # if read failed for any reason, treat as missing
-            existing = pd.DataFrame()
 
-        if existing is None or existing.empty:
-            merged = new_df.copy()
-        else:
-            # concat and deduplicate by date, prefer newest rows
-            merged = pd.concat([existing, new_df], ignore_index=True, sort=False)
-            if "date" in merged.columns:
-                merged["date"] = pd.to_datetime(merged["date"])
-                merged.sort_values(by="date", inplace=True)
-                merged = merged.drop_duplicates(
-                    subset=["date"], keep="last"
-                ).reset_index(drop=True)
-            else:
-                # fallback: drop exact-duplicate rows
-                merged = merged.drop_duplicates().reset_index(drop=True)
-    else:
-        merged = new_df.copy()
+def fetch_and_update_many(
+    tickers: Sequence[str],
+    period: str = "1y",
+    providers: Optional[Sequence[PriceProvider]] = None,
+    delay: float = 0.0,
+) -> List[str]:
+    """Fetch several tickers (bulk where supported) and merge each into the store.
 
-    # write back
-    write_parquet(ticker, merged, meta={"merged_at": datetime.utcnow().isoformat()})
-    return merged
+    `delay` spaces out tickers fetched one at a time (see `fetch_prices_many`).
+    Returns the tickers that were updated; the rest are logged and skipped.
+    """
+    # adjusted legacy stores are refetched in full once and replaced
+    legacy = [t for t in tickers if _holds_adjusted_prices(t)]
+    current = [t for t in tickers if t not in legacy]
+    fetched = fetch_prices_many(
+        current, period=period, providers=providers, delay=delay
+    )
+    if legacy:
+        fetched.update(
+            fetch_prices_many(legacy, period="max", providers=providers, delay=delay)
+        )
+    # one vectorized validation pass over the whole batch
+    checks = validate_batch(fetched)
+    updated = []
+    for ticker, new_df in fetched.items():
+        try:
+            _store_fetched(ticker, new_df, materialize=False, validation=checks[ticker])
+            updated.append(ticker)
+        except Exception as exc:
+            logging.warning("storing %s failed: %s", ticker, exc)
+    return updated
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+from src import data
+from src.model import predict_next_prices, simulate_intervals_batch
+
+
+def _store_path(ticker: str) -> Path:
+    return data.DATA_DIR / "forecasts" / f"{ticker}.json"
+
+
+def _key(model: str, params: Dict) -> str:
+    return f"{model}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _load(ticker: str) -> Dict[str, Dict]:
+    try:
+        return json.loads(_store_path(ticker).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save(ticker: str, entries: Dict[str, Dict]) -> None:
+    path = _store_path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # atomic replace so concurrent viewers never read a half-written file
+    tmp_fd, tmp_path = tempfile.mkstemp(
+        suffix=".json", prefix=f"{ticker}-", dir=path.parent
+    )
+    try:
+        with os.fdopen(tmp_fd, "w") as fh:
+            json.dump(entries, fh, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+def _history_rows(window: Optional[int], n_paths: int, lookback: int) -> int:
+    # the SMA forecast only needs the trailing window; intervals use `lookback`
+    return max(window or 10, lookback if n_paths > 0 else 0)
+
+
+def _ticker_seed(ticker: str) -> int:
+    # stable per ticker, so a band is the same whether computed alone or in a
+    # watchlist batch, and every viewer of a data version sees the same one
+    return zlib.crc32(ticker.encode())
+
+
+def _forecast_sma_many(
+    histories: Dict[str, pd.DataFrame],
+    days: int = 3,
+    window: Optional[int] = None,
+    n_paths: int = 0,
+    method: str = "bootstrap",
+    level: float = 0.9,
+    lookback: int = 250,
+) -> Dict[str, Dict]:
+    results = {}
+    for ticker, df in histories.items():
+        values = predict_next_prices(df["close"].tolist(), days=days, window=window)
+        results[ticker] = {
+            "last_date": str(df["date"].iloc[-1].date()),
+            "values": values,
+        }
+    if n_paths > 0 and histories:
+        # one vectorized simulation for every ticker that needs a band
+        bands = simulate_intervals_batch(
+            [df["close"].tolist() for df in histories.values()],
+            days,
+            window,
+            n_paths=n_paths,
+            method=method,
+            level=level,
+            seed=[_ticker_seed(t) for t in histories],
+        )
+        for ticker, band in zip(histories, bands):
+            results[ticker]["intervals"] = [list(b) for b in band]
+    return results
+
+
+def _read_history(ticker: str, rows: int) -> pd.DataFrame:
+    df = data.read_tail(ticker, rows, columns=["date", "close"])
+    if df.empty:
+        raise ValueError(f"No stored prices for ticker {ticker}")
+    return df
+
+
+def _forecast_sma(ticker: str, **params) -> Dict:
+    rows = _history_rows(
+        params.get("window"), params.get("n_paths", 0), params.get("lookback", 250)
+    )
+    return _forecast_sma_many({ticker: _read_history(ticker, rows)}, **params)[ticker]
+
+
+def _forecast_sma_batch(tickers: Iterable[str], **params) -> Dict[str, Dict]:
+    rows = _history_rows(
+        params.get("window"), params.get("n_paths", 0), params.get("lookback", 250)
+    )
+    histories = {}
+    for ticker in tickers:
+        try:
+            histories[ticker] = _read_history(ticker, rows)
+        except Exception as exc:
+            logging.warning("forecast precompute failed for %s: %s", ticker, exc)
+    return _forecast_sma_many(histories, **params)
+
+
+# model name -> callable(ticker, **params) returning {"last_date", "values", ...}
+MODELS: Dict[str, Callable[..., Dict]] = {"sma": _forecast_sma}
+# model name -> callable(tickers, **params) returning {ticker: result}; used by
+# precompute_forecasts, which falls back to MODELS one ticker at a time
+BATCH_MODELS: Dict[str, Callable[..., Dict[str, Dict]]] = {"sma": _forecast_sma_batch}
+
+# What the dashboard requests. `refresh-many --precompute` and `predict`
+# default to the same params so precomputed entries are the ones viewers read.
+DASHBOARD_PARAMS: Dict = {"days": 3, "window": 3, "n_paths": 10_000}
+
+
+def get_forecast(ticker: str, model: str = "sma", **params) -> Dict:
+    """Return the forecast for `ticker`, computing it at most once per data version.
+
+    Forecasts are stored under data/forecasts/ keyed by (model, params) and
+    tagged with the ticker's data version; a write/merge of the price history
+    bumps the version and so invalidates them. Entries for older versions are
+    dropped when a new one is stored. Raises FileNotFoundError when the ticker
+    has no stored prices and ValueError for an unknown model.
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown forecast model {model!r}")
+    version = data.data_version(ticker)
+    hit = _cached(ticker, model, params, version)
+    if hit is not None:
+        return hit
+    return _store(ticker, model, params, version, MODELS[model](ticker, **params))
+
+
+def _cached(ticker: str, model: str, params: Dict, version: int) -> Optional[Dict]:
+    hit = _load(ticker).get(_key(model, params))
+    if hit is not None and hit.get("data_version") == version:
+        return hit
+    return None
+
+
+def _store(ticker: str, model: str, params: Dict, version: int, result: Dict) -> Dict:
+    result.update(
+        model=model,
+        params=params,
+        data_version=version,
+        computed_at=datetime.utcnow().isoformat(),
+    )
+    entries = {
+        k: v for k, v in _load(ticker).items() if v.get("data_version") == version
+    }
+    entries[_key(model, params)] = result
+    _save(ticker, entries)
+    return result
+
+
+def precompute_forecasts(
+    tickers: Iterable[str], model: str = "sma", **params
+) -> Dict[str, Dict]:
+    """Warm the store for every ticker in `tickers`; failures are logged and skipped.
+
+    Tickers whose entry is current are left alone; the rest are computed in
+    one `BATCH_MODELS` call (for "sma": one batched interval simulation).
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown forecast model {model!r}")
+    results = {}
+    versions = {}
+    for ticker in dict.fromkeys(tickers):
+        version = data.data_version(ticker)
+        hit = _cached(ticker, model, params, version)
+        if hit is not None:
+            results[ticker] = hit
+        else:
+            versions[ticker] = version
+    if not versions:
+        return results
+    if model in BATCH_MODELS:
+        computed = BATCH_MODELS[model](list(versions), **params)
+    else:
+        computed = {}
+        for ticker in versions:
+            try:
+                computed[ticker] = MODELS[model](ticker, **params)
+            except Exception as exc:
+                logging.warning("forecast precompute failed for %s: %s", ticker, exc)
+    for ticker, result in computed.items():
+        results[ticker] = _store(ticker, model, params, versions[ticker], result)
+    return results
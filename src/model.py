@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
 from src.features import sma
@@ -40,6 +41,118 @@ def predict_next_prices(
     return [float(last_sma) for _ in range(days)]
 
 
+def _log_returns(prices: Sequence[float]) -> np.ndarray:
+    arr = np.asarray(prices, dtype=float)
+    arr = arr[np.isfinite(arr) & (arr > 0)]
+    return np.diff(np.log(arr)) if len(arr) > 1 else np.empty(0)
+
+
+def simulate_intervals_batch(
+    series: Sequence[Sequence[float]],
+    days: int = 3,
+    window: Optional[int] = None,
+    n_paths: int = 10_000,
+    method: str = "bootstrap",
+    level: float = 0.9,
+    chunk_elements: int = 1_000_000,
+    seed: Optional[Union[int, Sequence[int]]] = None,
+) -> List[List[Tuple[float, float]]]:
+    """Monte Carlo prediction intervals around `predict_next_prices` for many series.
+
+    Each path multiplies the point forecast by the cumulative product of
+    simulated daily gross returns, so the band is centred on the dashed SMA
+    line. `method` is "bootstrap" (resample the series' demeaned log returns)
+    or "gbm" (normal log returns with the series' volatility, zero drift).
+    Series and horizon are both processed in blocks of about `chunk_elements`
+    path values; with temporaries, peak memory is roughly 6 x 8 bytes per
+    block value. A step's quantiles need all of its paths, so a block never
+    holds fewer than `n_paths` values. Each series draws from its own stream
+    spawned from `seed`, so results do not depend on the chunking; pass one
+    seed per series to also make them independent of the batch composition.
+
+    Returns one list of `days` (low, high) tuples per input series; a series
+    with fewer than two valid prices gets a zero-width band.
+    """
+    if method not in ("bootstrap", "gbm"):
+        raise ValueError("method must be 'bootstrap' or 'gbm'")
+    if not 0 < level < 1:
+        raise ValueError("level must be between 0 and 1")
+    if n_paths < 1:
+        raise ValueError("n_paths must be >= 1")
+    if days <= 0:
+        return [[] for _ in series]
+
+    centers = np.array([predict_next_prices(list(s), days, window) for s in series])
+    returns = [_log_returns(s) for s in series]
+    n_series = len(series)
+    lengths = np.array([len(r) for r in returns])
+    # pad residuals into one (series, max_len) table for vectorized resampling
+    resid = np.zeros((n_series, max(1, int(lengths.max(initial=0)))))
+    for i, r in enumerate(returns):
+        if len(r):
+            resid[i, : len(r)] = r - r.mean()
+    sigma = np.array([r.std(ddof=1) if len(r) > 1 else 0.0 for r in returns])
+
+    if seed is None or isinstance(seed, (int, np.integer)):
+        seeds = np.random.SeedSequence(seed).spawn(n_series)
+    else:
+        seeds = list(seed)
+        if len(seeds) != n_series:
+            raise ValueError("need one seed per series")
+    rngs = [np.random.default_rng(s) for s in seeds]
+    alpha = (1 - level) / 2
+    lows = np.empty((n_series, days))
+    highs = np.empty((n_series, days))
+    per_block = max(1, min(n_series, chunk_elements // n_paths))
+    for first in range(0, n_series, per_block):
+        rows = slice(first, min(n_series, first + per_block))
+        m = rows.stop - rows.start
+        chunk = max(1, chunk_elements // (m * n_paths))
+        state = np.zeros((m, 1, n_paths))
+        for start in range(0, days, chunk):
+            steps = min(chunk, days - start)
+            shape = (m, steps, n_paths)
+            # Generator draws fill in order, so per-series blocks of steps
+            # reproduce the same stream whatever the chunk sizes
+            if method == "bootstrap":
+                u = np.stack(
+                    [rngs[i].random(shape[1:]) for i in range(first, rows.stop)]
+                )
+                idx = (u * lengths[rows, None, None]).astype(np.int64)
+                shocks = np.take_along_axis(
+                    resid[rows], idx.reshape(m, -1), axis=1
+                ).reshape(shape)
+            else:
+                z = np.stack(
+                    [
+                        rngs[i].standard_normal(shape[1:])
+                        for i in range(first, rows.stop)
+                    ]
+                )
+                s = sigma[rows, None, None]
+                shocks = z * s - 0.5 * s**2
+            cum = state + np.cumsum(shocks, axis=1)
+            state = cum[:, -1:, :]
+            q = np.quantile(np.exp(cum), [alpha, 1 - alpha], axis=2)
+            lows[rows, start : start + steps] = q[0]
+            highs[rows, start : start + steps] = q[1]
+    lows *= centers
+    highs *= centers
+    return [
+        [(float(lo), float(hi)) for lo, hi in zip(lows[i], highs[i])]
+        for i in range(n_series)
+    ]
+
+
+def simulate_intervals(
+    prices: List[float], days: int = 3, window: Optional[int] = None, **kwargs
+) -> List[Tuple[float, float]]:
+    """Single-series wrapper around `simulate_intervals_batch`."""
+    if prices is None or len(prices) == 0:
+        raise ValueError("Insufficient data")
+    return simulate_intervals_batch([prices], days=days, window=window, **kwargs)[0]
+
+
 # Gated/time-consuming models are intentionally not implemented under current governance
 def train_arima(df: pd.DataFrame):
     raise NotImplementedError("ARIMA training is gated behind governance approval")
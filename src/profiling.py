@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import io
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+# Opt-in per-request profiling. Set US_PREDICT_PROFILE to the share of requests
+# to profile ("1" = all, "0.02" = 2%); unset or 0 disables it. Output goes to
+# US_PREDICT_PROFILE_DIR (default data/profiles), keeping the newest
+# US_PREDICT_PROFILE_KEEP requests (default 50), each with a top-N summary
+# (US_PREDICT_PROFILE_TOP, default 25).
+
+ENV_RATE = "US_PREDICT_PROFILE"
+ENV_DIR = "US_PREDICT_PROFILE_DIR"
+ENV_KEEP = "US_PREDICT_PROFILE_KEEP"
+ENV_TOP = "US_PREDICT_PROFILE_TOP"
+
+# set while a request is being profiled so nested calls are not profiled twice
+_active: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "profiling_active", default=False
+)
+
+F = TypeVar("F", bound=Callable)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logging.warning("ignoring invalid %s=%r", name, os.environ.get(name))
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env_float(name, default))
+
+
+def should_profile(rate: Optional[float] = None, force: bool = False) -> bool:
+    """Decide whether this request is profiled (`force` wins over sampling)."""
+    if _active.get():
+        return False
+    if force:
+        return True
+    rate = _env_float(ENV_RATE, 0.0) if rate is None else rate
+    return rate > 0 and random.random() < rate
+
+
+def _profile_dir(out_dir: Optional[Path]) -> Path:
+    if out_dir is not None:
+        return Path(out_dir)
+    if os.environ.get(ENV_DIR):
+        return Path(os.environ[ENV_DIR])
+    from src import data
+
+    return data.DATA_DIR / "profiles"
+
+
+def _prune(out_dir: Path, keep: int) -> None:
+    # each request writes <stem>.prof and <stem>.txt; drop the oldest stems
+    stems = sorted(
+        {p.stem for p in out_dir.glob("*.prof")},
+        key=lambda stem: (out_dir / f"{stem}.prof").stat().st_mtime,
+    )
+    for stem in stems[: max(0, len(stems) - keep)]:
+        for suffix in (".prof", ".txt"):
+            try:
+                (out_dir / f"{stem}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _write(profiler, label: str, elapsed: float, out_dir: Path, top: int) -> Path:
+    import pstats
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    stem = f"{stamp}-{int(time.time() * 1000) % 1000:03d}-{label}-{os.getpid()}"
+    path = out_dir / f"{stem}.prof"
+    profiler.dump_stats(str(path))
+    buf = io.StringIO()
+    buf.write(f"{label}: {elapsed:.3f}s wall\n\n")
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+    (out_dir / f"{stem}.txt").write_text(buf.getvalue())
+    return path
+
+
+@contextmanager
+def profiled(
+    label: str,
+    force: bool = False,
+    rate: Optional[float] = None,
+    out_dir: Optional[Path] = None,
+    keep: Optional[int] = None,
+    top: Optional[int] = None,
+) -> Iterator[None]:
+    """Profile the enclosed block with cProfile when this request is sampled.
+
+    Writes `<stamp>-<label>-<pid>.prof` (load with `pstats`/snakeviz) and a
+    `.txt` top-N summary sorted by cumulative time, then prunes old profiles.
+    The profile is written even if the block raises. Nested `profiled` blocks
+    inside a profiled request run unprofiled.
+    """
+    if not should_profile(rate, force):
+        yield
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as exc:
+        # another profiler (e.g. a concurrent request on 3.12+) is active
+        logging.info("profiling %s skipped: %s", label, exc)
+        yield
+        return
+    token = _active.set(True)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active.reset(token)
+        elapsed = time.perf_counter() - start
+        try:
+            target = _profile_dir(out_dir)
+            path = _write(
+                profiler,
+                label,
+                elapsed,
+                target,
+                _env_int(ENV_TOP, 25) if top is None else top,
+            )
+            _prune(target, _env_int(ENV_KEEP, 50) if keep is None else keep)
+            logging.info("profile for %s written to %s", label, path)
+        except Exception as exc:
+            # profiling must never break the request it observes
+            logging.warning("writing profile for %s failed: %s", label, exc)
+
+
+def profile_calls(label: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of `profiled`, sampled per call."""
+
+    def decorate(fn: F) -> F:
+        name = label or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profiled(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
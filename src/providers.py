@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import io
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+# Provider libraries (yfinance, requests) are imported inside fetch methods so
+# importing this module stays cheap and works without network dependencies.
+
+
+class ProviderError(RuntimeError):
+    """A provider could not return data for a request."""
+
+
+class RateLimitError(ProviderError):
+    """The provider rejected the request because of rate limiting (HTTP 429)."""
+
+
+class PriceProvider(ABC):
+    """Base class for daily/intraday price sources.
+
+    Subclasses set the capability flags and implement `fetch`; bulk providers
+    also override `fetch_many`. `cost` orders providers when several can serve
+    a request (lower is cheaper). Returned frames use the provider's native
+    column names and are normalized by `src.data`.
+    """
+
+    name = "base"
+    cost = 100
+    supports_bulk = False
+    supports_ranges = False
+    supports_intervals = False
+
+    @abstractmethod
+    def fetch(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Return bars for one ticker; raise ProviderError when unavailable."""
+
+    def fetch_many(
+        self,
+        tickers: Sequence[str],
+        period: str = "1y",
+        interval: str = "1d",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Fetch several tickers; the default loops over `fetch`.
+
+        Tickers that fail or come back empty are left out of the result.
+        """
+        out = {}
+        for ticker in tickers:
+            try:
+                df = self.fetch(ticker, period, interval, start, end)
+            except ProviderError as exc:
+                logging.info("%s: fetch_many skipped %s: %s", self.name, ticker, exc)
+                continue
+            if df is not None and not df.empty:
+                out[ticker] = df
+        return out
+
+    def can_serve(
+        self, bulk: bool = False, ranges: bool = False, intervals: bool = False
+    ) -> bool:
+        return (
+            (not bulk or self.supports_bulk)
+            and (not ranges or self.supports_ranges)
+            and (not intervals or self.supports_intervals)
+        )
+
+
+def _is_rate_limit(exc: Exception) -> bool:
+    # yfinance reports throttling through its own exception types/messages
+    msg = str(exc).lower()
+    return (
+        "ratelimit" in type(exc).__name__.lower()
+        or "429" in msg
+        or "too many requests" in msg
+        or "rate limit" in msg
+    )
+
+
+class YFinanceProvider(PriceProvider):
+    """yfinance `Ticker.history`, falling back to `yf.download`; bulk via download."""
+
+    name = "yfinance"
+    cost = 1
+    supports_bulk = True
+    supports_ranges = True
+    supports_intervals = True
+
+    def fetch(self, ticker, period="1y", interval="1d", start=None, end=None):
+        import yfinance as yf
+
+        # unadjusted closes plus split/dividend columns: adjustment is applied
+        # on read from the stored action index (see src.adjustments)
+        kwargs = {"interval": interval, "auto_adjust": False, "actions": True}
+        if start is not None or end is not None:
+            kwargs.update(start=start, end=end)
+        else:
+            kwargs["period"] = period
+        try:
+            df = yf.Ticker(ticker).history(**kwargs)
+            if df is None or df.empty:
+                # yf.download sometimes succeeds where history does not
+                df = yf.download(ticker, progress=False, **kwargs)
+        except Exception as exc:
+            if _is_rate_limit(exc):
+                raise RateLimitError(
+                    f"Yahoo Finance rate limited (HTTP 429) when fetching {ticker}"
+                ) from exc
+            raise ProviderError(f"yfinance failed for {ticker}: {exc}") from exc
+        if isinstance(df.columns, pd.MultiIndex):
+            # single-ticker download may still return (field, ticker) columns
+            df = df.droplevel(-1, axis=1)
+        return df
+
+    def fetch_many(self, tickers, period="1y", interval="1d", start=None, end=None):
+        import yfinance as yf
+
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        kwargs = {"interval": interval, "auto_adjust": False, "actions": True}
+        if start is not None or end is not None:
+            kwargs.update(start=start, end=end)
+        else:
+            kwargs["period"] = period
+        try:
+            raw = yf.download(
+                tickers, group_by="ticker", progress=False, threads=True, **kwargs
+            )
+        except Exception as exc:
+            if _is_rate_limit(exc):
+                raise RateLimitError(
+                    "Yahoo Finance rate limited (HTTP 429) on bulk download"
+                ) from exc
+            raise ProviderError(f"yfinance bulk download failed: {exc}") from exc
+        out = {}
+        for ticker in tickers:
+            if not isinstance(raw.columns, pd.MultiIndex):
+                frame = raw
+            elif ticker in raw.columns.get_level_values(0):
+                frame = raw[ticker]
+            else:
+                continue
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                out[ticker] = frame
+        return out
+
+
+class YahooCSVProvider(PriceProvider):
+    """Yahoo Finance `v7/finance/download` CSV endpoint over `requests`.
+
+    `Close` from this endpoint is split-adjusted, so splits and dividends are
+    fetched from the same endpoint's event downloads and returned as
+    `Stock Splits`/`Dividends` columns like yfinance; the store needs them to
+    recover traded prices. If the events cannot be fetched, neither are the
+    bars.
+    """
+
+    name = "yahoo-csv"
+    cost = 2
+    supports_ranges = True
+    supports_intervals = True
+
+    URL = "https://query1.finance.yahoo.com/v7/finance/download/{ticker}"
+
+    def __init__(self, debug_dir: Optional[Path] = None, timeout: float = 10):
+        self.debug_dir = debug_dir
+        self.timeout = timeout
+
+    def fetch(self, ticker, period="1y", interval="1d", start=None, end=None):
+        period1 = int(pd.Timestamp(start).timestamp()) if start is not None else 0
+        period2 = int(pd.Timestamp(end).timestamp()) if end is not None else 9999999999
+        params = {"period1": period1, "period2": period2, "interval": interval}
+        df = self._download(ticker, {**params, "events": "history"})
+        for events, column in (("split", "Stock Splits"), ("div", "Dividends")):
+            found = self._download(ticker, {**params, "events": events})
+            df[column] = _event_column(df["Date"], found, column)
+        return df
+
+    def _download(self, ticker: str, params: Dict) -> pd.DataFrame:
+        import requests
+
+        # use a browser-like user-agent to reduce automated-blocking
+        headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"}
+        try:
+            resp = requests.get(
+                self.URL.format(ticker=ticker),
+                params=params,
+                headers=headers,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as exc:
+            raise ProviderError(f"CSV download failed for {ticker}: {exc}") from exc
+        if resp.status_code == 429:
+            self._save_debug(ticker, resp.text)
+            raise RateLimitError(
+                f"Yahoo Finance rate limited (HTTP 429) when fetching {ticker}"
+            )
+        if resp.status_code >= 400:
+            raise ProviderError(
+                f"CSV download ({params['events']}) for {ticker}: "
+                f"HTTP {resp.status_code}"
+            )
+        if not resp.text:
+            raise ProviderError("Empty response from Yahoo download endpoint")
+        try:
+            return pd.read_csv(io.StringIO(resp.text), parse_dates=["Date"])
+        except Exception as exc:
+            raise ProviderError(f"Unparseable CSV for {ticker}: {exc}") from exc
+
+    def _save_debug(self, ticker: str, text: str) -> None:
+        # save a small debug copy of the response body to help diagnosis
+        if self.debug_dir is None:
+            return
+        try:
+            self.debug_dir.mkdir(parents=True, exist_ok=True)
+            (self.debug_dir / f"debug_{ticker}.txt").write_text(text[:4096])
+        except Exception:
+            pass
+
+
+def _split_ratio(value) -> float:
+    # event CSVs report splits as "2:1" (older responses "2/1")
+    text = str(value).strip()
+    for sep in (":", "/"):
+        if sep in text:
+            num, den = text.split(sep, 1)
+            return float(num) / float(den)
+    return float(text)
+
+
+def _event_column(dates: pd.Series, events: pd.DataFrame, column: str) -> pd.Series:
+    # align an event download onto the bars by date; 0 where nothing happened
+    if events.empty or column not in events.columns:
+        return pd.Series(0.0, index=dates.index)
+    values = events[column]
+    if column == "Stock Splits":
+        values = values.map(_split_ratio)
+    by_date = pd.Series(
+        pd.to_numeric(values, errors="coerce").to_numpy(),
+        index=events["Date"].dt.normalize(),
+    )
+    by_date = by_date[~by_date.index.duplicated(keep="last")]
+    return dates.dt.normalize().map(by_date).fillna(0.0)
+
+
+_PERIOD_UNITS = {"d": "D", "wk": "W", "mo": "M", "y": "Y"}
+
+
+def _period_start(last: pd.Timestamp, period: str) -> Optional[pd.Timestamp]:
+    if period in ("max", "", None):
+        return None
+    for suffix, unit in sorted(_PERIOD_UNITS.items(), key=lambda kv: -len(kv[0])):
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            n = int(period[: -len(suffix)])
+            if unit == "D":
+                return last - pd.Timedelta(days=n)
+            if unit == "W":
+                return last - pd.Timedelta(weeks=n)
+            if unit == "M":
+                return last - pd.DateOffset(months=n)
+            return last - pd.DateOffset(years=n)
+    raise ProviderError(f"unsupported period {period!r}")
+
+
+class LocalProvider(PriceProvider):
+    """Replay recorded responses from a directory, with no network.
+
+    Each ticker is a `<TICKER>.parquet` or `<TICKER>.csv` file (Yahoo CSV
+    layout with a `Date` column). `period` is measured back from the last
+    recorded bar. Use `record` to capture live responses for later replay.
+    """
+
+    name = "local"
+    cost = 0
+    supports_bulk = True
+    supports_ranges = True
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    def _path(self, ticker: str) -> Optional[Path]:
+        for suffix in (".parquet", ".csv"):
+            path = self.root / f"{ticker}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def tickers(self) -> List[str]:
+        names = {p.stem for p in self.root.glob("*.parquet")}
+        names.update(p.stem for p in self.root.glob("*.csv"))
+        return sorted(names)
+
+    def fetch(self, ticker, period="1y", interval="1d", start=None, end=None):
+        if interval != "1d":
+            raise ProviderError("local recordings are daily bars only")
+        path = self._path(ticker)
+        if path is None:
+            raise ProviderError(f"no recording for {ticker} in {self.root}")
+        if path.suffix == ".parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+        date_col = "Date" if "Date" in df.columns else "date"
+        if df.empty or date_col not in df.columns:
+            return df
+        dates = pd.to_datetime(df[date_col])
+        df[date_col] = dates
+        lo = pd.Timestamp(start) if start is not None else None
+        if lo is None and end is None:
+            lo = _period_start(dates.max(), period)
+        mask = pd.Series(True, index=df.index)
+        if lo is not None:
+            mask &= dates >= lo
+        if end is not None:
+            mask &= dates < pd.Timestamp(end)
+        return df[mask].reset_index(drop=True)
+
+    def record(self, ticker: str, df: pd.DataFrame) -> Path:
+        """Save a provider response so it can be replayed later."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{ticker}.parquet"
+        frame = df.reset_index() if "Date" not in df.columns else df
+        frame.to_parquet(path, index=False)
+        return path
+
+
+def default_providers(debug_dir: Optional[Path] = None) -> List[PriceProvider]:
+    """The network providers used when none are passed explicitly."""
+    return [YFinanceProvider(), YahooCSVProvider(debug_dir=debug_dir)]
+
+
+def select_providers(
+    providers: Sequence[PriceProvider],
+    bulk: bool = False,
+    ranges: bool = False,
+    intervals: bool = False,
+) -> List[PriceProvider]:
+    """Providers able to serve the request, cheapest first (stable on ties)."""
+    capable = [p for p in providers if p.can_serve(bulk, ranges, intervals)]
+    return sorted(capable, key=lambda p: p.cost)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data import list_tickers, read_tail
+
+
+@dataclass(frozen=True)
+class Panel:
+    """Date-aligned price panel for a universe of tickers.
+
+    `values[column]` is a float array of shape (len(dates), len(tickers)); bars a
+    ticker does not have on a given date are NaN.
+    """
+
+    dates: np.ndarray
+    tickers: List[str]
+    values: Dict[str, np.ndarray]
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.values:
+            raise KeyError(f"panel has no column {name!r}")
+        return self.values[name]
+
+
+def _as_naive_dates(ser: pd.Series) -> np.ndarray:
+    dates = ser if ser.dtype.kind == "M" else pd.to_datetime(ser)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    # truncate to the day in numpy; dt.normalize also infers a frequency
+    return dates.to_numpy().astype("datetime64[D]").astype("datetime64[ns]")
+
+
+def load_panel(
+    tickers: Optional[Iterable[str]] = None,
+    columns: Sequence[str] = ("close", "volume"),
+    lookback: int = 260,
+) -> Panel:
+    """Load the last `lookback` bars of `columns` for every ticker into a Panel.
+
+    `tickers` defaults to every ticker in the local store. Tickers without a
+    stored file are skipped. Only `date` and `columns` are read from the
+    store. Build the panel once and reuse it across screens.
+    """
+    if lookback < 1:
+        raise ValueError("lookback must be >= 1")
+    names = list(tickers) if tickers is not None else list_tickers()
+    wanted = ["date", *(c for c in columns if c != "date")]
+    frames = []
+    kept: List[str] = []
+    for ticker in names:
+        try:
+            df = read_tail(ticker, lookback, columns=wanted)
+        except FileNotFoundError:
+            continue
+        if "date" not in df.columns or df.empty:
+            continue
+        frames.append(df)
+        kept.append(ticker)
+
+    if not frames:
+        empty = {c: np.empty((0, 0)) for c in columns}
+        return Panel(np.empty(0, dtype="datetime64[ns]"), [], empty)
+
+    per_ticker_dates = [_as_naive_dates(df["date"]) for df in frames]
+    dates = np.unique(np.concatenate(per_ticker_dates))[-lookback:]
+    values = {c: np.full((len(dates), len(kept)), np.nan) for c in columns}
+    for j, (df, tdates) in enumerate(zip(frames, per_ticker_dates)):
+        rows = np.searchsorted(dates, tdates)
+        # drop bars older than the panel window; keep the last bar for a date
+        ok = (rows < len(dates)) & (dates[np.minimum(rows, len(dates) - 1)] == tdates)
+        for c in columns:
+            if c in df.columns:
+                col = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+                values[c][rows[ok], j] = col[ok]
+    return Panel(dates, kept, values)
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    # NaN-skipping rolling mean along axis 0 with min_periods=1, like features.sma
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    sums = csum.copy()
+    counts = ccount.copy()
+    sums[window:] -= csum[:-window]
+    counts[window:] -= ccount[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = sums / counts
+    out[counts == 0] = np.nan
+    return out
+
+
+def rolling_sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Vectorized SMA over every column of a (dates, tickers) array."""
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    return _rolling_mean(x, window)
+
+
+def rolling_rsi(x: np.ndarray, window: int = 14) -> np.ndarray:
+    """Vectorized RSI over every column, from the same rolling means as features.rsi.
+
+    A window with gains and no losses is 100 and a flat window 50. Bars
+    without a close, or without any price change in the window, are NaN so
+    those tickers drop out of screens (features.rsi fills them with 0).
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    delta = np.diff(x, axis=0, prepend=np.full((1,) + x.shape[1:], np.nan))
+    up = _rolling_mean(np.clip(delta, 0, None), window)
+    down = _rolling_mean(-np.clip(delta, None, 0), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = 100 - (100 / (1 + up / down))
+        out = np.where(down == 0, np.where(up > 0, 100.0, 50.0), out)
+    out[np.isnan(x) | np.isnan(up)] = np.nan
+    return out
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Boolean screen over a Panel; combine with `&`, `|` and `~`."""
+
+    name: str
+    evaluate: Callable[[Panel], np.ndarray]
+
+    def __call__(self, panel: Panel) -> np.ndarray:
+        return np.asarray(self.evaluate(panel), dtype=bool)
+
+    def __and__(self, other: "Condition") -> "Condition":
+        return Condition(f"({self.name} & {other.name})", lambda p: self(p) & other(p))
+
+    def __or__(self, other: "Condition") -> "Condition":
+        return Condition(f"({self.name} | {other.name})", lambda p: self(p) | other(p))
+
+    def __invert__(self) -> "Condition":
+        return Condition(f"~{self.name}", lambda p: ~self(p))
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Per-ticker value on the last panel date; compare it to get a Condition."""
+
+    name: str
+    compute: Callable[[Panel], np.ndarray]
+
+    def __call__(self, panel: Panel) -> np.ndarray:
+        return np.asarray(self.compute(panel), dtype=float)
+
+    def _cmp(self, op: str, value: float, fn: Callable) -> Condition:
+        # NaN never satisfies a comparison, so tickers missing the bar drop out
+        return Condition(f"{self.name} {op} {value}", lambda p: fn(self(p), value))
+
+    def __lt__(self, value: float) -> Condition:  # type: ignore[override]
+        return self._cmp("<", value, np.less)
+
+    def __le__(self, value: float) -> Condition:  # type: ignore[override]
+        return self._cmp("<=", value, np.less_equal)
+
+    def __gt__(self, value: float) -> Condition:  # type: ignore[override]
+        return self._cmp(">", value, np.greater)
+
+    def __ge__(self, value: float) -> Condition:  # type: ignore[override]
+        return self._cmp(">=", value, np.greater_equal)
+
+
+def _last(x: np.ndarray) -> np.ndarray:
+    if x.shape[0] == 0:
+        return np.full(x.shape[1], np.nan)
+    return x[-1]
+
+
+def close(column: str = "close") -> Metric:
+    return Metric(column, lambda p: _last(p.column(column)))
+
+
+def sma(window: int, column: str = "close") -> Metric:
+    return Metric(
+        f"sma{window}", lambda p: _last(rolling_sma(p.column(column), window))
+    )
+
+
+def rsi(window: int = 14, column: str = "close") -> Metric:
+    return Metric(
+        f"rsi{window}", lambda p: _last(rolling_rsi(p.column(column), window))
+    )
+
+
+def pct_change(periods: int = 1, column: str = "close") -> Metric:
+    """Fractional change between the last bar and `periods` bars earlier."""
+
+    def _compute(p: Panel) -> np.ndarray:
+        x = p.column(column)
+        if x.shape[0] <= periods:
+            return np.full(x.shape[1], np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return x[-1] / x[-1 - periods] - 1.0
+
+    return Metric(f"pct_change{periods}", _compute)
+
+
+def volume_ratio(window: int = 20, column: str = "volume") -> Metric:
+    """Last volume divided by the mean volume of the preceding `window` bars."""
+
+    def _compute(p: Panel) -> np.ndarray:
+        x = p.column(column)
+        if x.shape[0] < 2:
+            return np.full(x.shape[1], np.nan)
+        prior = x[-1 - window : -1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return x[-1] / np.nanmean(np.where(prior > 0, prior, np.nan), axis=0)
+
+    return Metric(f"volume_ratio{window}", _compute)
+
+
+def _sma_cross(window: int, column: str, above: bool) -> Condition:
+    def _evaluate(p: Panel) -> np.ndarray:
+        x = p.column(column)
+        if x.shape[0] < 2:
+            return np.zeros(x.shape[1], dtype=bool)
+        diff = x[-2:] - rolling_sma(x, window)[-2:]
+        if above:
+            return (diff[0] <= 0) & (diff[1] > 0)
+        return (diff[0] >= 0) & (diff[1] < 0)
+
+    direction = "above" if above else "below"
+    return Condition(f"crossed_{direction}_sma{window}", _evaluate)
+
+
+def crossed_above_sma(window: int, column: str = "close") -> Condition:
+    """Close was at/below its SMA on the previous bar and is above it now."""
+    return _sma_cross(window, column, above=True)
+
+
+def crossed_below_sma(window: int, column: str = "close") -> Condition:
+    """Close was at/above its SMA on the previous bar and is below it now."""
+    return _sma_cross(window, column, above=False)
+
+
+def screen(
+    panel: Panel,
+    condition: Condition,
+    rank_by: Optional[Metric] = None,
+    ascending: bool = False,
+    limit: Optional[int] = None,
+    metrics: Sequence[Metric] = (),
+) -> pd.DataFrame:
+    """Evaluate `condition` across the panel and return the matching tickers.
+
+    The result has a `ticker` column, the last close and one column per metric
+    in `metrics` and `rank_by`. Rows are ordered by `rank_by` (NaN last) when
+    given, otherwise by ticker.
+    """
+    mask = condition(panel)
+    idx = np.flatnonzero(mask)
+    out = {"ticker": [panel.tickers[i] for i in idx]}
+    if "close" in panel.values:
+        out["close"] = _last(panel.column("close"))[idx]
+    for metric in list(metrics) + ([rank_by] if rank_by is not None else []):
+        out[metric.name] = metric(panel)[idx]
+    result = pd.DataFrame(out)
+    if rank_by is not None:
+        result = result.sort_values(
+            rank_by.name, ascending=ascending, na_position="last", kind="mergesort"
+        )
+    if limit is not None:
+        result = result.head(limit)
+    return result.reset_index(drop=True)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils import WEEKENDS, load_holiday_calendar
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+NUMERIC_COLUMNS = PRICE_COLUMNS + ("adj_close", "volume")
+
+# outlier_dates kept per ticker in the meta sidecar
+MAX_REPORTED_DATES = 5
+
+
+def coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert price/volume columns that arrived as strings to floats.
+
+    Values that cannot be parsed become NaN (and are counted as `non_numeric`
+    by `validate_batch`). Already-numeric columns are left untouched.
+    """
+    out = df
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and df[col].dtype.kind not in "iufb":
+            if out is df:
+                out = df.copy()
+            out[col] = pd.to_numeric(df[col], errors="coerce")
+    return out
+
+
+CHECKED_COLUMNS = PRICE_COLUMNS + ("volume",)
+
+
+def _numeric(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    # (rows, CHECKED_COLUMNS) float block and a per-row count of values that
+    # could not be parsed; missing columns are all-NaN
+    out = np.full((len(df), len(CHECKED_COLUMNS)), np.nan)
+    bad = np.zeros(len(df), dtype=np.int64)
+    for i, col in enumerate(CHECKED_COLUMNS):
+        if col not in df.columns:
+            continue
+        ser = df[col]
+        if ser.dtype.kind in "iufb":
+            out[:, i] = ser.to_numpy()
+            continue
+        values = pd.to_numeric(ser, errors="coerce").to_numpy(dtype=float)
+        bad += np.isnan(values) & ser.notna().to_numpy()
+        out[:, i] = values
+    return out, bad
+
+
+def _dates(df: pd.DataFrame) -> np.ndarray:
+    if "date" not in df.columns:
+        return np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+    dates = df["date"]
+    # only parse when needed: strings, or naive and tz-aware frames mixed
+    if dates.dtype.kind != "M":
+        dates = pd.to_datetime(dates, errors="coerce", utc=True)
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+def validate_batch(
+    frames: Mapping[str, pd.DataFrame],
+    max_abs_return: float = 0.5,
+    max_missing_ratio: float = 0.05,
+) -> Dict[str, Dict]:
+    """Run data-quality checks over a batch of fetched frames in one pass.
+
+    All frames are concatenated once into flat arrays and every check is a
+    vectorized operation over the whole batch, reduced per ticker with
+    `bincount`. Per ticker the result counts non-numeric values, NaN closes,
+    non-monotonic dates, trading days missing versus the calendar, OHLC
+    inconsistencies, non-positive prices and outlier daily returns (a move
+    beyond `max_abs_return` up, or the equivalent down, e.g. a 2:1 split),
+    with the first few outlier dates. `ok` is True when nothing was flagged;
+    missing days only count against it above `max_missing_ratio` of the
+    expected days, since the holiday calendar is not populated yet.
+    """
+    tickers = list(frames)
+    n = len(tickers)
+    if n == 0:
+        return {}
+    sizes = np.array([len(frames[t]) for t in tickers], dtype=np.int64)
+    codes = np.repeat(np.arange(n), sizes)
+
+    def _count(mask: np.ndarray, at: np.ndarray = codes) -> np.ndarray:
+        return np.bincount(at[mask], minlength=n)
+
+    # a single concat is far cheaper than touching each small frame's columns
+    batch = pd.concat([frames[t] for t in tickers], ignore_index=True, sort=False)
+    dates = _dates(batch)
+    block, unparseable = _numeric(batch)
+    non_numeric = np.bincount(codes, weights=unparseable, minlength=n).astype(int)
+    prices = {c: block[:, i] for i, c in enumerate(CHECKED_COLUMNS)}
+    o, h, lo, c = (prices[k] for k in PRICE_COLUMNS)
+
+    # in the order received: out-of-order or duplicated dates
+    same = codes[1:] == codes[:-1]
+    with np.errstate(invalid="ignore"):
+        step = (dates[1:] - dates[:-1]).astype("timedelta64[D]").astype(np.int64)
+    bad_dates = np.isnat(dates)
+    non_mono = _count(same & (step <= 0) & ~bad_dates[1:] & ~bad_dates[:-1], codes[1:])
+
+    # everything below works on rows sorted by (ticker, date); providers
+    # normally return sorted rows, so skip the sort when nothing is out of order
+    if non_mono.any() or bad_dates.any():
+        order = np.lexsort((dates, codes))
+        sd, sc, close = dates[order], codes[order], c[order]
+    else:
+        sd, sc, close = dates, codes, c
+    valid = ~np.isnat(sd)
+    dup = np.zeros(len(sd), dtype=bool)
+    dup[1:] = (sc[1:] == sc[:-1]) & (sd[1:] == sd[:-1])
+    weekmask = [0 if i in WEEKENDS else 1 for i in range(7)]
+    holidays = np.array(load_holiday_calendar(), dtype="datetime64[D]")
+    on_calendar = np.zeros(len(sd), dtype=bool)
+    on_calendar[valid] = np.is_busday(sd[valid], weekmask=weekmask, holidays=holidays)
+    present = _count(on_calendar & ~dup, sc)
+    # rows are sorted per ticker, so the first/last valid row bound its dates
+    vc, vd = sc[valid], sd[valid]
+    has, first_idx = np.unique(vc, return_index=True)
+    last_idx = len(vc) - 1 - np.unique(vc[::-1], return_index=True)[1]
+    expected = np.zeros(n, dtype=np.int64)
+    expected[has] = np.busday_count(
+        vd[first_idx],
+        vd[last_idx] + np.timedelta64(1, "D"),
+        weekmask=weekmask,
+        holidays=holidays,
+    )
+    missing = np.clip(expected - present, 0, None)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ohlc_bad = (h < lo) | (h < np.fmax(o, c)) | (lo > np.fmin(o, c))
+        nonpos = np.zeros(len(c), dtype=bool)
+        for col in PRICE_COLUMNS:
+            nonpos |= prices[col] <= 0
+        ratio = close[1:] / close[:-1]
+        outlier = (
+            (sc[1:] == sc[:-1])
+            & ~dup[1:]
+            & ((ratio > 1 + max_abs_return) | (ratio < 1 / (1 + max_abs_return)))
+        )
+    outliers = _count(outlier, sc[1:])
+    ohlc = _count(ohlc_bad)
+    nonpositive = _count(nonpos)
+    nan_close = _count(np.isnan(c))
+
+    outlier_dates: Dict[int, list] = {}
+    for i in np.flatnonzero(outlier):
+        dates_for = outlier_dates.setdefault(int(sc[i + 1]), [])
+        if len(dates_for) < MAX_REPORTED_DATES:
+            dates_for.append(str(sd[i + 1]))
+
+    checked_at = datetime.utcnow().isoformat()
+    results = {}
+    for j, ticker in enumerate(tickers):
+        counts = {
+            "rows": int(sizes[j]),
+            "non_numeric": int(non_numeric[j]),
+            "nan_close": int(nan_close[j]),
+            "non_monotonic_dates": int(non_mono[j]),
+            "missing_trading_days": int(missing[j]),
+            "ohlc_inconsistent": int(ohlc[j]),
+            "nonpositive_prices": int(nonpositive[j]),
+            "outlier_returns": int(outliers[j]),
+        }
+        flagged = [k for k, v in counts.items() if v and k != "rows"]
+        if "missing_trading_days" in flagged and (
+            missing[j] <= max_missing_ratio * expected[j]
+        ):
+            flagged.remove("missing_trading_days")
+        results[ticker] = {
+            **counts,
+            "outlier_dates": outlier_dates.get(j, []),
+            "ok": not flagged,
+            "checked_at": checked_at,
+        }
+    return results
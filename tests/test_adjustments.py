@@ -0,0 +1,318 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import adjustments
+from src.data import (
+    add_actions,
+    data_version,
+    fetch_and_update_many,
+    fetch_and_update_parquet,
+    read_actions,
+    read_meta,
+    read_parquet,
+    read_tail,
+    write_parquet,
+)
+
+
+def provider_frame(dates, closes, splits=None, dividends=None):
+    n = len(dates)
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(dates),
+            "close": closes,
+            "volume": [100.0] * n,
+            "Dividends": dividends or [0.0] * n,
+            "Stock Splits": splits or [0.0] * n,
+        }
+    )
+
+
+def test_extract_actions_and_index():
+    df = provider_frame(
+        ["2025-01-02", "2025-01-03", "2025-01-06"],
+        [50.0, 40.0, 41.0],
+        splits=[0, 2.0, 0],
+        dividends=[0, 0, 4.0],
+    )
+    prices, actions = adjustments.extract_actions(df)
+    assert "Stock Splits" not in prices.columns
+    assert actions["split"].tolist() == [2.0, 1.0]
+    assert actions["factor"].tolist() == pytest.approx([0.5, 0.9])
+
+    index = adjustments.build_index(actions)
+    assert index["price"] == pytest.approx([0.45, 0.9])
+    adjusted = adjustments.apply_index(prices, index)
+    assert adjusted["close"].tolist() == pytest.approx([22.5, 36.0, 41.0])
+    assert adjusted["volume"].tolist() == [200.0, 100.0, 100.0]
+
+
+def test_split_after_merge_is_applied_on_read(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        # provider reports split-adjusted closes: traded 100, 102 before a 2:1
+        first = provider_frame(
+            ["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"],
+            [50.0, 51.0, 52.0, 53.0],
+            splits=[0, 0, 2.0, 0],
+        )
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": first.copy()
+        )
+        fetch_and_update_parquet("TEST")
+        raw = read_parquet("TEST", adjust=False)
+        assert raw["close"].tolist() == [100.0, 102.0, 52.0, 53.0]
+        assert "Stock Splits" not in raw.columns
+        assert read_parquet("TEST")["close"].tolist() == [50.0, 51.0, 52.0, 53.0]
+
+        # a later 3:1 split only arrives with the recent bars
+        second = provider_frame(
+            ["2025-01-07", "2025-01-08"], [53.0 / 3, 18.0], splits=[0, 3.0]
+        )
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": second.copy()
+        )
+        fetch_and_update_parquet("TEST", materialize=False)
+
+        raw = read_parquet("TEST", adjust=False)
+        # older history was not rewritten
+        assert raw["close"].tolist()[:3] == [100.0, 102.0, 52.0]
+        adjusted = read_parquet("TEST")["close"].tolist()
+        assert adjusted == pytest.approx([50 / 3, 17.0, 52 / 3, 53 / 3, 18.0])
+        tail = read_tail("TEST", 2, columns=["close"])
+        assert list(tail.columns) == ["close"]
+        assert tail["close"].tolist() == pytest.approx([53 / 3, 18.0])
+        assert len(read_actions("TEST")) == 2
+    finally:
+        os.chdir(root)
+
+
+def test_add_actions_bumps_version(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        write_parquet(
+            "TEST",
+            pd.DataFrame(
+                {
+                    "date": pd.to_datetime(["2025-01-02", "2025-01-03"]),
+                    "close": [10.0, 5.0],
+                }
+            ),
+        )
+        before = data_version("TEST")
+        add_actions(
+            "TEST",
+            pd.DataFrame(
+                {
+                    "date": pd.to_datetime(["2025-01-03"]),
+                    "split": [2.0],
+                    "dividend": [0.0],
+                    "factor": [0.5],
+                }
+            ),
+        )
+        assert data_version("TEST") == before + 1
+        assert read_parquet("TEST")["close"].tolist() == [5.0, 5.0]
+    finally:
+        os.chdir(root)
+
+
+def test_dividend_on_first_fetched_bar_keeps_its_factor(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = ["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"]
+        first = provider_frame(
+            dates, [100.0, 100.0, 99.0, 99.0], dividends=[0, 0, 1.0, 0]
+        )
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": first.copy()
+        )
+        fetch_and_update_parquet("TEST")
+        assert read_actions("TEST")["factor"].tolist() == pytest.approx([0.99])
+
+        # the rolling window now starts on the ex-date
+        second = provider_frame(dates[2:], [99.0, 98.0], dividends=[1.0, 0])
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": second.copy()
+        )
+        fetch_and_update_parquet("TEST", materialize=False)
+        assert read_actions("TEST")["factor"].tolist() == pytest.approx([0.99])
+        closes = read_parquet("TEST")["close"].tolist()
+        assert closes == pytest.approx([99.0, 99.0, 99.0, 98.0])
+    finally:
+        os.chdir(root)
+
+
+def test_unknown_dividend_factor_from_stored_close(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        # stored raw bars before a 2:1 split; the dividend arrives split-adjusted
+        write_parquet(
+            "TEST",
+            pd.DataFrame(
+                {
+                    "date": pd.to_datetime(["2025-01-02", "2025-01-03"]),
+                    "close": [100.0, 100.0],
+                }
+            ),
+        )
+        fetched = provider_frame(
+            ["2025-01-06", "2025-01-07"],
+            [49.0, 49.0],
+            splits=[0, 2.0],
+            dividends=[0.5, 0],
+        )
+        _, actions = adjustments.extract_actions(fetched)
+        assert actions["factor"].isna().tolist() == [True, False]
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": fetched.copy()
+        )
+        fetch_and_update_parquet("TEST", materialize=False)
+
+        stored = read_actions("TEST")
+        assert stored["factor"].tolist() == pytest.approx([0.99, 0.5])
+        closes = read_parquet("TEST")["close"].tolist()
+        assert closes == pytest.approx([49.5, 49.5, 49.0, 49.0])
+
+    finally:
+        os.chdir(root)
+
+
+def test_merge_actions_keeps_stored_factor_for_unknown():
+    old = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2025-01-06"]),
+            "split": [1.0],
+            "dividend": [1.0],
+            "factor": [0.99],
+        }
+    )
+    new = old.assign(factor=[float("nan")])
+    assert adjustments.merge_actions(old, new)["factor"].tolist() == [0.99]
+    # with nothing stored an unknown factor only applies its split
+    assert adjustments.build_index(new)["price"] == [1.0]
+
+
+def test_adjusted_close_is_not_stored_or_returned(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        fetched = provider_frame(["2025-01-02", "2025-01-03"], [10.0, 11.0])
+        fetched["adj_close"] = [9.0, 10.0]
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": fetched.copy()
+        )
+        fetch_and_update_parquet("TEST")
+        assert "adj_close" not in pd.read_parquet("data/stock_TEST.parquet").columns
+        # older stores may still carry it; reads leave it out
+        write_parquet("OLD", fetched.drop(columns=["Dividends", "Stock Splits"]))
+        assert "adj_close" not in read_parquet("OLD").columns
+        assert "adj_close" not in read_tail("OLD", 1).columns
+    finally:
+        os.chdir(root)
+
+
+def write_legacy_store(ticker, df):
+    # what the code before the action file wrote: auto-adjusted closes with the
+    # provider's action columns and a sidecar without a "prices" marker
+    Path("data").mkdir(exist_ok=True)
+    df.to_parquet(f"data/stock_{ticker}.parquet", index=False)
+    meta = {"written_at": "2025-01-01T00:00:00", "rows": len(df)}
+    Path(f"data/stock_{ticker}.meta.json").write_text(json.dumps(meta))
+
+
+def test_legacy_adjusted_store_is_read_as_is(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        legacy = provider_frame(
+            ["2025-01-02", "2025-01-03"], [50.0, 52.0], splits=[0, 2.0]
+        )
+        write_legacy_store("OLD", legacy)
+        add_actions(
+            "OLD",
+            pd.DataFrame(
+                {
+                    "date": pd.to_datetime(["2025-01-03"]),
+                    "split": [2.0],
+                    "dividend": [0.0],
+                    "factor": [0.5],
+                }
+            ),
+        )
+        # closes already carry the split: no second adjustment on read
+        df = read_parquet("OLD")
+        assert df["close"].tolist() == [50.0, 52.0]
+        assert "Dividends" not in df.columns and "Stock Splits" not in df.columns
+        assert "Stock Splits" not in read_tail("OLD", 1).columns
+    finally:
+        os.chdir(root)
+
+
+def test_refresh_replaces_legacy_store_once(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        # adjusted for a 2:1 split on 01-06 that is in the store already
+        write_legacy_store(
+            "TEST",
+            provider_frame(
+                ["2025-01-02", "2025-01-03", "2025-01-06"],
+                [49.0, 50.0, 52.0],
+                splits=[0, 0, 2.0],
+            ),
+        )
+        periods = []
+
+        def fake_fetch(ticker, period="1y"):
+            periods.append(period)
+            return provider_frame(
+                ["2025-01-03", "2025-01-06", "2025-01-07"],
+                [50.0, 52.0, 53.0],
+                splits=[0, 2.0, 0],
+            )
+
+        monkeypatch.setattr("src.data.fetch_prices", fake_fetch)
+        fetch_and_update_parquet("TEST")
+        # full refetch replaced the adjusted rows instead of merging into them
+        assert periods == ["max"]
+        assert read_meta("TEST")["prices"] == "raw"
+        raw = pd.read_parquet("data/stock_TEST.parquet")
+        assert raw["close"].tolist() == [100.0, 52.0, 53.0]
+        assert "Stock Splits" not in raw.columns
+        assert read_parquet("TEST")["close"].tolist() == [50.0, 52.0, 53.0]
+
+        fetch_and_update_parquet("TEST")
+        assert periods == ["max", "1y"]
+        assert read_parquet("TEST")["close"].tolist() == [50.0, 52.0, 53.0]
+    finally:
+        os.chdir(root)
+
+
+def test_refresh_many_refetches_legacy_stores_in_full(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        write_legacy_store("OLD", provider_frame(["2025-01-02"], [10.0]))
+        write_parquet("NEW", provider_frame(["2025-01-02"], [20.0]))
+        calls = []
+
+        def fake_many(tickers, period="1y", providers=None, delay=0.0):
+            calls.append((list(tickers), period))
+            return {t: provider_frame(["2025-01-03"], [30.0]) for t in tickers}
+
+        monkeypatch.setattr("src.data.fetch_prices_many", fake_many)
+        assert sorted(fetch_and_update_many(["OLD", "NEW"])) == ["NEW", "OLD"]
+        assert calls == [(["NEW"], "1y"), (["OLD"], "max")]
+        assert read_parquet("OLD")["close"].tolist() == [30.0]
+        assert read_parquet("NEW")["close"].tolist() == [20.0, 30.0]
+    finally:
+        os.chdir(root)
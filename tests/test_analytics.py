@@ -0,0 +1,165 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import analytics
+from src.data import write_parquet
+
+
+def test_rolling_moments_match_full_recompute():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 0.01, size=(80, 4))
+    steps = list(analytics.rolling_moments(x, window=20, resync=7))
+    assert len(steps) == 61
+    for row, cov in steps:
+        expected = np.cov(x[row - 19 : row + 1], rowvar=False)
+        np.testing.assert_allclose(cov, expected, atol=1e-12)
+
+
+def test_rolling_moments_skip_missing_returns_pairwise():
+    rng = np.random.default_rng(2)
+    x = rng.normal(0, 0.01, size=(70, 3))
+    x[:25, 1] = np.nan  # listed later
+    x[40:44, 2] = np.nan  # gap
+    for row, cov in analytics.rolling_moments(x, window=30, resync=5):
+        frame = pd.DataFrame(x[row - 29 : row + 1])
+        np.testing.assert_allclose(cov, frame.cov().to_numpy(), atol=1e-12)
+    # correlations use each side's variance over the rows the pair shares
+    window = x[-30:]
+    sums = analytics._PairwiseSums(window, np.zeros(3))
+    expected = pd.DataFrame(window).corr().to_numpy()
+    np.testing.assert_allclose(sums.corr(), expected, atol=1e-12)
+
+
+def test_correlation_matrix_aligned_and_cached(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.bdate_range("2025-01-01", periods=40)
+        rng = np.random.default_rng(1)
+        base = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 40)))
+        write_parquet("AAA", pd.DataFrame({"date": dates, "close": base}))
+        write_parquet("BBB", pd.DataFrame({"date": dates, "close": base * 2}))
+        # CCC is missing a bar mid-series
+        gap = pd.DataFrame({"date": dates, "close": base[::-1]}).drop(index=20)
+        write_parquet("CCC", gap)
+
+        returns = analytics.return_panel(["AAA", "BBB", "CCC"], lookback=60)
+        assert len(returns) == 39
+        assert not returns.isna().any().any()
+
+        calls = []
+        real = analytics.return_panel
+        monkeypatch.setattr(
+            analytics, "return_panel", lambda *a, **k: calls.append(1) or real(*a, **k)
+        )
+        corr = analytics.correlation_matrix(["AAA", "BBB", "CCC"], window=20)
+        assert corr.loc["AAA", "BBB"] == pytest.approx(1.0)
+        assert corr.loc["AAA", "CCC"] < 0
+        analytics.correlation_matrix(["AAA", "BBB", "CCC"], window=20)
+        assert len(calls) == 1
+
+        # a write bumps the data version and invalidates the cache
+        write_parquet("AAA", pd.DataFrame({"date": dates, "close": base[::-1]}))
+        corr = analytics.correlation_matrix(["AAA", "BBB", "CCC"], window=20)
+        assert len(calls) == 2
+        # only the forward-filled bar keeps it from being exactly 1
+        assert corr.loc["AAA", "CCC"] == pytest.approx(1.0, abs=1e-3)
+    finally:
+        os.chdir(root)
+
+
+def test_matrices_empty_when_history_shorter_than_window(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.bdate_range("2025-01-01", periods=20)
+        closes = np.linspace(100, 110, 20)
+        write_parquet("AAA", pd.DataFrame({"date": dates, "close": closes}))
+        write_parquet("BBB", pd.DataFrame({"date": dates, "close": closes[::-1]}))
+
+        assert analytics.covariance_matrix(["AAA", "BBB"], window=60).empty
+        assert analytics.correlation_matrix(["AAA", "BBB"], window=60).empty
+    finally:
+        os.chdir(root)
+
+
+def test_newly_listed_ticker_has_no_fabricated_returns(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.bdate_range("2025-01-01", periods=120)
+        rng = np.random.default_rng(3)
+        base = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))
+        write_parquet("OLD", pd.DataFrame({"date": dates, "close": base}))
+        # NEW listed 30 bars ago and moves exactly like OLD since then
+        write_parquet(
+            "NEW", pd.DataFrame({"date": dates[-30:], "close": base[-30:] / 4})
+        )
+
+        returns = analytics.return_panel(["OLD", "NEW"], lookback=100)
+        assert returns["NEW"].isna().sum() == 71
+        assert returns["NEW"].dropna().tolist() == pytest.approx(
+            returns["OLD"].tail(29).tolist()
+        )
+
+        corr = analytics.correlation_matrix(["OLD", "NEW"], window=60)
+        assert corr.loc["OLD", "NEW"] == pytest.approx(1.0)
+        cov = analytics.covariance_matrix(["OLD", "NEW"], window=60)
+        window = returns.tail(60)
+        assert cov.loc["NEW", "NEW"] == pytest.approx(window["NEW"].var())
+        assert cov.loc["OLD", "OLD"] == pytest.approx(window["OLD"].var())
+        assert cov.loc["OLD", "NEW"] == pytest.approx(window.cov().loc["OLD", "NEW"])
+
+        # too few shared rows for the pair
+        sparse = analytics.correlation_matrix(["OLD", "NEW"], window=60, min_periods=40)
+        assert np.isnan(sparse.loc["OLD", "NEW"])
+        assert sparse.loc["OLD", "OLD"] == 1.0
+    finally:
+        os.chdir(root)
+
+
+def test_cached_matrices_advance_window_on_append(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.bdate_range("2025-01-01", periods=101)
+        rng = np.random.default_rng(4)
+        a = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 101)))
+        b = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 101)))
+
+        def write(n, a=a, b=b):
+            write_parquet("AAA", pd.DataFrame({"date": dates[:n], "close": a[:n]}))
+            write_parquet("BBB", pd.DataFrame({"date": dates[:n], "close": b[:n]}))
+
+        rebuilds = []
+        real = analytics._PairwiseSums.reset
+        monkeypatch.setattr(
+            analytics._PairwiseSums,
+            "reset",
+            lambda self, block: rebuilds.append(1) or real(self, block),
+        )
+        write(100)
+        analytics.correlation_matrix(["AAA", "BBB"], window=20)
+        assert len(rebuilds) == 1
+
+        # one appended bar: the cached window sums move by one row
+        write(101)
+        corr = analytics.correlation_matrix(["AAA", "BBB"], window=20)
+        assert len(rebuilds) == 1
+        expected = analytics.return_panel(["AAA", "BBB"]).tail(20).corr()
+        np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=1e-12)
+
+        # history inside the window changed: rebuilt from scratch
+        edited = a.copy()
+        edited[95] *= 1.1
+        write(101, a=edited)
+        corr = analytics.correlation_matrix(["AAA", "BBB"], window=20)
+        assert len(rebuilds) == 2
+        expected = analytics.return_panel(["AAA", "BBB"]).tail(20).corr()
+        np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=1e-12)
+    finally:
+        os.chdir(root)
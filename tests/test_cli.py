@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from src.cli import main
+from src.data import write_parquet
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _loaded_after(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code + "; print(sorted(sys.modules))"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return out.stdout
+
+
+def test_import_data_does_not_load_providers(tmp_path):
+    loaded = _loaded_after("import sys, src.data")
+    assert "'yfinance'" not in loaded
+    assert "'requests'" not in loaded
+    # importing must not create data/ as a side effect
+    subprocess.run(
+        [sys.executable, "-c", "import src.data"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        check=True,
+    )
+    assert not (tmp_path / "data").exists()
+
+
+def test_cli_help_does_not_load_pandas():
+    loaded = _loaded_after("import sys, src.cli; src.cli.build_parser()")
+    assert "'pandas'" not in loaded
+
+
+def test_cli_predict_and_show(tmp_path, capsys):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        df = pd.DataFrame(
+            {
+                "date": pd.to_datetime(["2025-01-08", "2025-01-09", "2025-01-10"]),
+                "close": [10.0, 11.0, 12.0],
+            }
+        )
+        write_parquet("TEST", df)
+
+        assert main(["predict", "TEST", "--days", "2", "--window", "3"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        # 2025-01-10 is a Friday, so the forecast skips the weekend
+        assert lines == ["2025-01-13\t11.0000", "2025-01-14\t11.0000"]
+
+        assert main(["show", "TEST", "--rows", "1"]) == 0
+        assert "12.0" in capsys.readouterr().out
+
+        assert main(["show", "MISSING"]) == 1
+    finally:
+        os.chdir(root)
+
+
+def test_refresh_precompute_warms_dashboard_forecast(tmp_path, monkeypatch):
+    from src import forecast_store
+
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        rec = tmp_path / "recordings"
+        rec.mkdir()
+        dates = pd.bdate_range("2025-01-01", periods=30)
+        closes = [100 + i % 5 for i in range(30)]
+        pd.DataFrame({"Date": dates, "Close": closes}).to_csv(
+            rec / "AAA.csv", index=False
+        )
+        argv = ["refresh-many", "AAA", "--replay-dir", str(rec), "--period", "max"]
+        assert main(argv + ["--precompute"]) == 0
+
+        calls = []
+        real = forecast_store.MODELS["sma"]
+        monkeypatch.setitem(
+            forecast_store.MODELS,
+            "sma",
+            lambda *a, **k: calls.append(k) or real(*a, **k),
+        )
+        # the dashboard's own call is served from the precomputed entry
+        hit = forecast_store.get_forecast("AAA", **forecast_store.DASHBOARD_PARAMS)
+        assert calls == []
+        assert len(hit["intervals"]) == forecast_store.DASHBOARD_PARAMS["days"]
+    finally:
+        os.chdir(root)
@@ -1,8 +1,15 @@
 import pandas as pd
 import os
+import pytest
 from pathlib import Path
 
-from src.data import write_parquet, fetch_and_update_parquet
+from src.data import (
+    write_parquet,
+    fetch_and_update_parquet,
+    iter_prices,
+    read_parquet,
+    read_tail,
+)
 
 
 def make_df(dates, vals):
@@ -75,3 +82,96 @@ def test_fetch_ionq(tmp_path, monkeypatch):
 
     finally:
         os.chdir(root)
+
+
+def test_iter_prices_batches(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.date_range("2025-01-01", periods=10, freq="D")
+        write_parquet("TEST", make_df(dates, list(range(10))))
+
+        chunks = list(iter_prices("TEST", batch_rows=4, columns=["date", "close"]))
+        assert [len(c) for c in chunks] == [4, 4, 2]
+        assert list(chunks[0].columns) == ["date", "close"]
+        assert pd.concat(chunks)["close"].tolist() == list(range(10))
+
+        with pytest.raises(FileNotFoundError):
+            iter_prices("MISSING")
+    finally:
+        os.chdir(root)
+
+
+def test_fetch_and_update_streams_across_batches(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        monkeypatch.setattr("src.data.BATCH_ROWS", 3)
+        dates = pd.date_range("2025-01-01", periods=8, freq="D")
+        write_parquet("TEST", make_df(dates, list(range(8))))
+
+        # overwrite a middle date, a tail date, and append a new one
+        def fake_fetch(ticker, period="1y"):
+            return pd.DataFrame(
+                {
+                    "date": pd.to_datetime(["2025-01-04", "2025-01-08", "2025-01-09"]),
+                    "close": [40.5, 70.5, 80.5],
+                    "volume": [1, 2, 3],
+                }
+            )
+
+        monkeypatch.setattr("src.data.fetch_prices", fake_fetch)
+        assert fetch_and_update_parquet("TEST", materialize=False) is None
+
+        merged = read_parquet("TEST")
+        assert len(merged) == 9
+        assert merged["date"].is_monotonic_increasing
+        assert merged["close"].tolist() == [0, 1, 2, 40.5, 4, 5, 6, 70.5, 80.5]
+        assert merged["volume"].isna().sum() == 6
+        assert read_tail("TEST", 2)["close"].tolist() == [70.5, 80.5]
+    finally:
+        os.chdir(root)
+
+
+def test_fetch_and_update_unsorted_store_falls_back(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        write_parquet("TEST", make_df(["2025-01-03", "2025-01-01"], [3, 1]))
+
+        def fake_fetch(ticker, period="1y"):
+            return make_df(["2025-01-02"], [2])
+
+        monkeypatch.setattr("src.data.fetch_prices", fake_fetch)
+        merged = fetch_and_update_parquet("TEST")
+        assert merged["close"].tolist() == [1, 2, 3]
+    finally:
+        os.chdir(root)
+
+
+@pytest.mark.parametrize(
+    "stored_tz,fetched_tz", [("America/New_York", None), (None, "America/New_York")]
+)
+def test_fetch_and_update_mixed_timezones(tmp_path, monkeypatch, stored_tz, fetched_tz):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        existing = make_df(["2025-01-06", "2025-01-07"], [1.0, 2.0])
+        existing["date"] = existing["date"].dt.tz_localize(stored_tz)
+        write_parquet("TEST", existing)
+
+        def fake_fetch(ticker, period="1y"):
+            fetched = make_df(["2025-01-07", "2025-01-08"], [2.5, 3.0])
+            fetched["date"] = fetched["date"].dt.tz_localize(fetched_tz)
+            return fetched
+
+        monkeypatch.setattr("src.data.fetch_prices", fake_fetch)
+        merged = fetch_and_update_parquet("TEST")
+        # re-fetched day replaced, no shifted or duplicated trading days
+        assert merged["close"].tolist() == [1.0, 2.5, 3.0]
+        # the store keeps its own convention
+        assert (merged["date"].dt.tz is None) == (stored_tz is None)
+        days = merged["date"].dt.strftime("%Y-%m-%d %H:%M").tolist()
+        assert days == ["2025-01-06 00:00", "2025-01-07 00:00", "2025-01-08 00:00"]
+    finally:
+        os.chdir(root)
@@ -0,0 +1,102 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import forecast_store
+from src.data import data_version, fetch_and_update_parquet, write_parquet
+
+
+def make_df(dates, vals):
+    return pd.DataFrame({"date": pd.to_datetime(dates), "close": vals})
+
+
+def test_forecast_cached_until_data_version_changes(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        write_parquet("TEST", make_df(["2025-01-01", "2025-01-02"], [10, 12]))
+        assert data_version("TEST") == 1
+
+        calls = []
+        real = forecast_store.MODELS["sma"]
+
+        def counting(ticker, **params):
+            calls.append(ticker)
+            return real(ticker, **params)
+
+        monkeypatch.setitem(forecast_store.MODELS, "sma", counting)
+
+        first = forecast_store.get_forecast("TEST", days=2, window=2)
+        again = forecast_store.get_forecast("TEST", days=2, window=2)
+        assert first["values"] == again["values"] == [11.0, 11.0]
+        assert first["last_date"] == "2025-01-02"
+        assert len(calls) == 1
+
+        # different params are a different entry
+        forecast_store.get_forecast("TEST", days=1, window=1)
+        assert len(calls) == 2
+
+        monkeypatch.setattr(
+            "src.data.fetch_prices",
+            lambda ticker, period="1y": make_df(["2025-01-03"], [14]),
+        )
+        fetch_and_update_parquet("TEST")
+        assert data_version("TEST") == 2
+
+        updated = forecast_store.get_forecast("TEST", days=2, window=2)
+        assert updated["values"] == [13.0, 13.0]
+        assert updated["data_version"] == 2
+        assert len(calls) == 3
+    finally:
+        os.chdir(root)
+
+
+def test_precompute_skips_missing(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        write_parquet("TEST", make_df(["2025-01-01"], [10]))
+        warmed = forecast_store.precompute_forecasts(["TEST", "MISSING"], days=1)
+        assert list(warmed) == ["TEST"]
+        banded = forecast_store.get_forecast("TEST", days=2, n_paths=100)
+        assert banded["intervals"] == [[10.0, 10.0], [10.0, 10.0]]
+        with pytest.raises(ValueError):
+            forecast_store.get_forecast("TEST", model="nope")
+    finally:
+        os.chdir(root)
+
+
+def test_precompute_simulates_watchlist_in_one_batch(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.bdate_range("2025-01-01", periods=40)
+        for i, ticker in enumerate(["AAA", "BBB", "CCC"]):
+            closes = [100 + i + (j * (i + 2)) % 7 for j in range(40)]
+            write_parquet(ticker, make_df(dates, closes))
+        params = {"days": 3, "window": 3, "n_paths": 500}
+        # CCC is already current and must not be simulated again
+        alone = forecast_store.get_forecast("CCC", **params)
+
+        batches = []
+        real = forecast_store.simulate_intervals_batch
+        monkeypatch.setattr(
+            forecast_store,
+            "simulate_intervals_batch",
+            lambda series, *a, **k: batches.append(len(series))
+            or real(series, *a, **k),
+        )
+        warmed = forecast_store.precompute_forecasts(["AAA", "BBB", "CCC"], **params)
+        assert batches == [2]
+        assert warmed["CCC"] == alone
+
+        # batched bands match what a single-ticker request would compute
+        monkeypatch.setattr(forecast_store, "simulate_intervals_batch", real)
+        for ticker in ("AAA", "BBB"):
+            os.remove(forecast_store._store_path(ticker))
+            single = forecast_store.get_forecast(ticker, **params)
+            assert single["intervals"] == warmed[ticker]["intervals"]
+    finally:
+        os.chdir(root)
@@ -1,6 +1,12 @@
+import tracemalloc
+
 import pytest
 
-from src.model import predict_next_prices
+from src.model import (
+    predict_next_prices,
+    simulate_intervals,
+    simulate_intervals_batch,
+)
 
 
 def test_predict_basic():
@@ -25,3 +31,54 @@ def test_predict_days_zero():
 def test_predict_insufficient():
     with pytest.raises(ValueError):
         predict_next_prices([], days=3)
+
+
+def test_intervals_bracket_forecast():
+    prices = [10, 10.5, 10.2, 10.8, 11.1, 10.9, 11.4, 11.2, 11.8, 12.0]
+    point = predict_next_prices(prices, days=5, window=3)
+    for method in ("bootstrap", "gbm"):
+        bands = simulate_intervals(
+            prices, days=5, window=3, n_paths=5000, method=method, seed=0
+        )
+        assert len(bands) == 5
+        for (lo, hi), p in zip(bands, point):
+            assert lo < p < hi
+        # uncertainty grows with the horizon
+        assert bands[-1][1] - bands[-1][0] > bands[0][1] - bands[0][0]
+
+
+def test_intervals_chunked_matches_unchunked():
+    series = [[10, 11, 10.5, 12, 11.5, 12.5], [5, 5.2, 5.1, 5.4], [100, 98, 101]]
+    for method in ("bootstrap", "gbm"):
+        full = simulate_intervals_batch(
+            series, days=6, n_paths=200, method=method, seed=1
+        )
+        # one series and one day of paths per block
+        chunked = simulate_intervals_batch(
+            series, days=6, n_paths=200, method=method, seed=1, chunk_elements=1
+        )
+        assert chunked == full
+
+
+def test_intervals_memory_bounded_across_series():
+    series = [[10 + (i + j) % 7 for j in range(60)] for i in range(20)]
+    chunk_elements = 100_000
+    tracemalloc.start()
+    try:
+        simulate_intervals_batch(
+            series, days=5, n_paths=20_000, chunk_elements=chunk_elements, seed=0
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 20 series x 20k paths would be 3.2 MB per array if simulated together
+    assert peak < 12 * chunk_elements * 8
+
+
+def test_intervals_batch_and_degenerate():
+    bands = simulate_intervals_batch([[100], [10, 11, 12]], days=2, n_paths=100)
+    assert bands[0] == [(100.0, 100.0), (100.0, 100.0)]
+    assert len(bands[1]) == 2
+    assert simulate_intervals([1, 2], days=0) == []
+    with pytest.raises(ValueError):
+        simulate_intervals([1, 2], days=2, method="nope")
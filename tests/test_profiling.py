@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from src import profiling
+
+
+def _busy():
+    return sum(i * i for i in range(2000))
+
+
+def test_profiled_writes_profile_and_summary(tmp_path):
+    with profiling.profiled("req", force=True, out_dir=tmp_path, top=5):
+        _busy()
+    profs = list(tmp_path.glob("*.prof"))
+    summaries = list(tmp_path.glob("*.txt"))
+    assert len(profs) == 1 and len(summaries) == 1
+    text = summaries[0].read_text()
+    assert text.startswith("req: ")
+    assert "_busy" in text
+
+
+def test_profiled_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv(profiling.ENV_RATE, raising=False)
+    with profiling.profiled("req", out_dir=tmp_path):
+        _busy()
+    assert not list(tmp_path.iterdir())
+
+
+def test_sampling_retention_and_nesting(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.ENV_RATE, "1")
+    monkeypatch.setenv(profiling.ENV_DIR, str(tmp_path))
+    monkeypatch.setenv(profiling.ENV_KEEP, "2")
+
+    @profiling.profile_calls("outer")
+    def outer():
+        # nested profiled calls inside a profiled request are not profiled again
+        inner()
+
+    @profiling.profile_calls("inner")
+    def inner():
+        _busy()
+
+    for _ in range(3):
+        outer()
+        time.sleep(0.01)
+    stems = sorted(p.stem for p in tmp_path.glob("*.prof"))
+    assert len(stems) == 2
+    assert all("outer" in s for s in stems)
+    assert len(list(tmp_path.glob("*.txt"))) == 2
+
+
+def test_profile_written_when_block_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        with profiling.profiled("boom", force=True, out_dir=tmp_path):
+            raise RuntimeError("x")
+    assert len(list(tmp_path.glob("*.prof"))) == 1
@@ -0,0 +1,153 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data import (
+    fetch_and_update_many,
+    fetch_prices,
+    fetch_prices_many,
+    read_parquet,
+)
+from src.providers import (
+    LocalProvider,
+    PriceProvider,
+    ProviderError,
+    RateLimitError,
+    YahooCSVProvider,
+    YFinanceProvider,
+    select_providers,
+)
+
+
+def yahoo_frame(dates, closes):
+    return pd.DataFrame({"Date": pd.to_datetime(dates), "Close": closes})
+
+
+class FakeProvider(PriceProvider):
+    def __init__(self, name, cost, result=None, error=None):
+        self.name = name
+        self.cost = cost
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    def fetch(self, ticker, period="1y", interval="1d", start=None, end=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_select_providers_cheapest_capable(tmp_path):
+    local = LocalProvider(tmp_path)
+    yfp = YFinanceProvider()
+    csv = YahooCSVProvider()
+    assert select_providers([csv, yfp, local]) == [local, yfp, csv]
+    assert select_providers([csv, yfp, local], bulk=True) == [local, yfp]
+    assert select_providers([csv, yfp, local], intervals=True) == [yfp, csv]
+
+
+def test_fetch_prices_falls_through_rate_limit():
+    limited = FakeProvider("a", 0, error=RateLimitError("HTTP 429"))
+    good = FakeProvider("b", 1, result=yahoo_frame(["2025-01-02"], [5.0]))
+    df = fetch_prices("TEST", providers=[good, limited], max_retries=1)
+    assert limited.calls == 1 and good.calls == 1
+    assert df["close"].tolist() == [5.0]
+
+    with pytest.raises(RateLimitError):
+        fetch_prices("TEST", providers=[limited], max_retries=1)
+
+
+def test_local_provider_replay_and_bulk_update(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        rec = LocalProvider(tmp_path / "recordings")
+        dates = pd.date_range("2024-01-01", "2025-01-31", freq="B")
+        rec.record("AAA", yahoo_frame(dates, range(len(dates))))
+        yahoo_frame(["2025-01-02", "2025-01-03"], [7.0, 8.0]).to_csv(
+            rec.root / "BBB.csv", index=False
+        )
+        assert rec.tickers() == ["AAA", "BBB"]
+
+        month = rec.fetch("AAA", period="1mo")
+        assert month["Date"].min() >= pd.Timestamp("2024-12-31")
+        ranged = rec.fetch("AAA", start="2024-06-03", end="2024-06-05")
+        assert len(ranged) == 2
+
+        updated = fetch_and_update_many(
+            ["AAA", "BBB", "MISSING"], period="max", providers=[rec]
+        )
+        assert updated == ["AAA", "BBB"]
+        assert len(read_parquet("AAA")) == len(dates)
+        # replayed frames store the same columns as the live path
+        assert list(read_parquet("AAA").columns) == ["date", "close", "fetched_at"]
+        assert read_parquet("BBB")["close"].tolist() == [7.0, 8.0]
+    finally:
+        os.chdir(root)
+
+
+def test_yahoo_csv_reports_splits_and_dividends(monkeypatch):
+    bodies = {
+        "history": "Date,Close\n2025-01-02,50.0\n2025-01-03,51.0\n2025-01-06,52.0\n",
+        "split": "Date,Stock Splits\n2025-01-03,2:1\n",
+        "div": "Date,Dividends\n2025-01-06,0.25\n",
+    }
+
+    class Response:
+        def __init__(self, text, status_code=200):
+            self.text = text
+            self.status_code = status_code
+
+    calls = []
+
+    def fake_get(url, params, headers, timeout):
+        calls.append(params["events"])
+        return Response(bodies[params["events"]])
+
+    monkeypatch.setattr("requests.get", fake_get)
+    df = YahooCSVProvider().fetch("TEST")
+    assert calls == ["history", "split", "div"]
+    assert df["Stock Splits"].tolist() == [0.0, 2.0, 0.0]
+    assert df["Dividends"].tolist() == [0.0, 0.0, 0.25]
+
+    # without the events the split-adjusted bars are not returned
+    monkeypatch.setattr(
+        "requests.get",
+        lambda url, params, headers, timeout: Response(
+            bodies["history"] if params["events"] == "history" else "",
+            200 if params["events"] == "history" else 404,
+        ),
+    )
+    with pytest.raises(ProviderError):
+        YahooCSVProvider().fetch("TEST")
+
+
+def test_fetch_prices_many_spaces_out_leftovers(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("src.data.time.sleep", sleeps.append)
+
+    class Flaky(PriceProvider):
+        name = "flaky"
+
+        def fetch(self, ticker, period="1y", interval="1d", start=None, end=None):
+            if ticker == "LIMIT":
+                raise RateLimitError("HTTP 429")
+            return yahoo_frame(["2025-01-02"], [1.0])
+
+    got = fetch_prices_many(
+        ["A", "B", "LIMIT", "C", "D"], providers=[Flaky()], delay=0.5
+    )
+    assert sorted(got) == ["A", "B", "C", "D"]
+    # back off right after the rate limit, then return to the normal delay
+    assert sleeps == [0.5, 0.5, 60, 0.5]
+
+
+def test_provider_without_fetch_cannot_be_instantiated():
+    class Incomplete(PriceProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
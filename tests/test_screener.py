@@ -0,0 +1,107 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import screener
+from src.data import write_parquet
+from src.features import rsi as series_rsi, sma as series_sma
+
+
+def make_df(dates, closes, volumes=None):
+    df = pd.DataFrame({"date": pd.to_datetime(dates), "close": closes})
+    if volumes is not None:
+        df["volume"] = volumes
+    return df
+
+
+def test_rolling_matches_features():
+    rng = np.random.default_rng(0)
+    x = rng.normal(100, 5, size=(40, 3))
+    x[5, 1] = np.nan
+    for j in range(3):
+        ser = pd.Series(x[:, j])
+        np.testing.assert_allclose(
+            screener.rolling_sma(x, 7)[:, j], series_sma(ser, 7).to_numpy()
+        )
+        # features.rsi fills undefined values with 0; compare where it is defined
+        expected = series_rsi(ser, 14).to_numpy()
+        got = screener.rolling_rsi(x, 14)[:, j]
+        defined = ~np.isnan(x[:, j]) & (expected != 0)
+        np.testing.assert_allclose(got[defined], expected[defined])
+
+
+def test_load_panel_and_screen(tmp_path):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.date_range("2025-01-01", periods=6, freq="D")
+        # UP crosses above its 3-bar SMA on the last bar with a volume spike
+        write_parquet("UP", make_df(dates, [10, 9, 8, 7, 6, 12], [1, 1, 1, 1, 1, 9]))
+        # DOWN keeps falling
+        write_parquet("DOWN", make_df(dates, [10, 9, 8, 7, 6, 5], [1] * 6))
+        # GAP misses the third bar
+        write_parquet("GAP", make_df(dates.delete(2), [5, 5, 7, 7.5, 7.2], [1] * 5))
+
+        panel = screener.load_panel(lookback=5)
+        assert panel.tickers == ["DOWN", "GAP", "UP"]
+        assert panel.column("close").shape == (5, 3)
+        assert np.isnan(panel.column("close")[1, 1])
+
+        cond = screener.crossed_above_sma(3) | (screener.rsi(3) < 30)
+        result = screener.screen(
+            panel, cond, rank_by=screener.pct_change(1), metrics=[screener.rsi(3)]
+        )
+        assert result["ticker"].tolist() == ["UP", "DOWN"]
+        assert result["pct_change1"].iloc[0] == 1.0
+
+        spikes = screener.screen(panel, screener.volume_ratio(3) > 2)
+        assert spikes["ticker"].tolist() == ["UP"]
+        assert screener.screen(panel, ~cond)["ticker"].tolist() == ["GAP"]
+    finally:
+        os.chdir(root)
+
+
+def test_load_panel_reads_only_requested_columns(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        dates = pd.date_range("2025-01-01", periods=4, freq="D")
+        df = make_df(dates, [1.0, 2.0, 3.0, 4.0], [5, 6, 7, 8])
+        df["open"] = df["close"]
+        write_parquet("AAA", df)
+
+        seen = []
+        real = screener.read_tail
+
+        def spy(ticker, rows, columns=None, **kwargs):
+            out = real(ticker, rows, columns=columns, **kwargs)
+            seen.append(list(out.columns))
+            return out
+
+        monkeypatch.setattr(screener, "read_tail", spy)
+        panel = screener.load_panel(columns=("close",), lookback=3)
+        assert seen == [["date", "close"]]
+        assert set(panel.values) == {"close"}
+        np.testing.assert_allclose(panel.column("close")[:, 0], [2.0, 3.0, 4.0])
+    finally:
+        os.chdir(root)
+
+
+def test_rsi_oversold_excludes_rising_flat_and_stale():
+    dates = pd.date_range("2025-01-01", periods=20, freq="D")
+    falling = np.linspace(120, 100, 20) + np.tile([0.0, 0.4], 10)
+    stale = falling.copy()
+    stale[-1] = np.nan
+    closes = np.column_stack(
+        [falling, np.linspace(100, 120, 20), np.full(20, 50.0), stale]
+    )
+    panel = screener.Panel(
+        dates.to_numpy(), ["FALL", "RISE", "FLAT", "STALE"], {"close": closes}
+    )
+    last = screener.rsi(14)(panel)
+    assert last[0] < 30
+    assert last[1] == 100.0 and last[2] == 50.0 and np.isnan(last[3])
+    result = screener.screen(panel, screener.rsi(14) < 30)
+    assert result["ticker"].tolist() == ["FALL"]
@@ -0,0 +1,88 @@
+import os
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import fetch_and_update_parquet, read_meta, read_parquet
+from src.validation import validate_batch
+
+
+def clean_frame(n=10, start="2025-01-06"):
+    dates = pd.bdate_range(start, periods=n)
+    close = np.linspace(100, 110, n)
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "open": close - 0.5,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": np.full(n, 1000),
+        }
+    )
+
+
+def test_validate_batch_flags_each_problem():
+    dirty = clean_frame()
+    dirty = dirty.drop(index=3).reset_index(drop=True)  # missing trading day
+    dirty.loc[1, "high"] = dirty.loc[1, "low"] - 1  # OHLC inconsistent
+    dirty.loc[5, "close"] = dirty.loc[4, "close"] / 2  # 2:1 split-like jump
+    dirty.loc[6, "open"] = 0  # non-positive price
+    dirty = dirty.astype({"volume": object})
+    dirty.loc[7, "volume"] = "n/a"  # scraper string
+    dirty = pd.concat([dirty.iloc[[0, 2, 1]], dirty.iloc[3:]])  # out of order
+
+    results = validate_batch({"CLEAN": clean_frame(), "DIRTY": dirty})
+    assert results["CLEAN"]["ok"]
+    d = results["DIRTY"]
+    assert not d["ok"]
+    assert d["missing_trading_days"] == 1
+    assert d["ohlc_inconsistent"] >= 1
+    assert d["outlier_returns"] == 2  # the drop and the rebound
+    assert d["outlier_dates"][0] == str(dirty.loc[5, "date"].date())
+    assert d["nonpositive_prices"] == 1
+    assert d["non_numeric"] == 1
+    assert d["non_monotonic_dates"] == 1
+
+
+def test_validate_batch_zero_close_does_not_warn():
+    df = clean_frame()
+    df.loc[4, "close"] = 0.0
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        result = validate_batch({"ZERO": df})["ZERO"]
+    assert result["nonpositive_prices"] == 1
+
+
+def test_validate_batch_is_fast_for_large_universe():
+    base = clean_frame(250)
+    frames = {f"T{i}": base for i in range(5000)}
+    start = time.perf_counter()
+    results = validate_batch(frames)
+    # ~0.4s locally; generous bound for slow CI machines
+    assert time.perf_counter() - start < 2
+    assert all(r["ok"] for r in results.values())
+
+
+def test_fetch_stores_validation_and_coerces_strings(tmp_path, monkeypatch):
+    root = Path.cwd()
+    try:
+        os.chdir(tmp_path)
+        scraped = pd.DataFrame(
+            {"date": ["2025-01-06", "2025-01-07"], "close": ["10.5", "-"]}
+        )
+        monkeypatch.setattr(
+            "src.data.fetch_prices", lambda ticker, period="1y": scraped.copy()
+        )
+        fetch_and_update_parquet("TEST")
+        meta = read_meta("TEST")
+        assert meta["validation"]["non_numeric"] == 1
+        assert meta["validation"]["ok"] is False
+        stored = read_parquet("TEST")
+        assert stored["close"].dtype.kind == "f"
+        assert stored["close"].iloc[0] == 10.5
+    finally:
+        os.chdir(root)